@@ -134,10 +134,10 @@ class MemoryGraphList:
         new_list = MemoryGraphList()
         if isinstance(item, slice):
             return new_list._set_internal_list(self._list[item])
-        if isinstance(item, list):
-            return new_list._set_internal_list([self._list[int(i)] for i in item])
-        if isinstance(item, np.ndarray):
-            return new_list._set_internal_list([self._list[int(i)] for i in item])
+        if isinstance(item, (list, np.ndarray)):
+            # Convert all indices to python int with one `tolist()` instead of calling `int()` on each numpy scalar.
+            index = np.asarray(item, dtype="int64").tolist()
+            return new_list._set_internal_list(list(map(self._list.__getitem__, index)))
         raise TypeError("Unsupported type for MemoryGraphList items.")
 
     def _set_internal_list(self, value: list):
@@ -176,9 +176,13 @@ class MemoryGraphList:
         props = self.obtain_property(item["name"])  # Will be list.
         is_ragged = item["ragged"] if "ragged" in item else False
         if is_ragged:
-            return ragged_tensor_from_nested_numpy(props)
+            out = ragged_tensor_from_nested_numpy(props)
         else:
-            return tf.constant(np.array(props))
+            out = tf.constant(np.array(props))
+        # Cast to dtype of input already here, which is otherwise done by the model for each batch.
+        if "dtype" in item and item["dtype"] is not None and out.dtype != tf.as_dtype(item["dtype"]):
+            out = tf.cast(out, dtype=item["dtype"])
+        return out
 
     def tensor(self, items, make_copy=True):
         if isinstance(items, dict):
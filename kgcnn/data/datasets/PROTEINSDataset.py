@@ -2,7 +2,6 @@ import os
 import numpy as np
 
 from kgcnn.data.datasets.GraphTUDataset2020 import GraphTUDataset2020
-from kgcnn.mol.encoder import OneHotEncoder
 
 
 class PROTEINSDataset(GraphTUDataset2020):
@@ -24,13 +23,13 @@ class PROTEINSDataset(GraphTUDataset2020):
         processing.
         """
         super(PROTEINSDataset, self).read_in_memory()
-        # One-hot encoders
-        ohe = OneHotEncoder(
+        # Categories for one-hot encoding.
+        ohe = np.array(
             [-538, -345, -344, -134, -125, -96, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20,
              21, 22, 23, 24, 25, 26, 27, 28, 29, 30, 31, 32, 33, 34, 35, 36, 37, 38, 39, 41, 42, 47, 61, 63, 73, 74, 75,
-             82, 104, 353, 355, 360, 558, 797, 798], add_unknown=False)
-        ohe2 = OneHotEncoder([0, 1, 2], add_unknown=False)
-        ohe3 = OneHotEncoder([i for i in range(0, 17)], add_unknown=False)
+             82, 104, 353, 355, 360, 558, 797, 798])
+        ohe2 = np.array([0, 1, 2])
+        ohe3 = np.arange(0, 17)
 
         graph_labels = self.obtain_property("graph_labels")
         node_attributes = self.obtain_property("node_attributes")
@@ -38,11 +37,27 @@ class PROTEINSDataset(GraphTUDataset2020):
         node_degree = self.obtain_property("node_degree")
         self.assign_property("graph_labels",
                              [np.array([0, 1]) if int(x) == 2 else np.array([1, 0]) for x in graph_labels])
-        self.assign_property("node_attributes", [np.array([ohe(int(y)) for y in x]) for x in node_attributes])
-        self.assign_property("node_labels", [np.array([ohe2(int(y)) for y in x]) for x in node_labels])
-        self.assign_property("node_degree", [np.array([ohe3(int(y)) for y in x]) for x in node_degree])
+        self.assign_property("node_attributes", self._one_hot_per_graph(node_attributes, ohe))
+        self.assign_property("node_labels", self._one_hot_per_graph(node_labels, ohe2))
+        self.assign_property("node_degree", self._one_hot_per_graph(node_degree, ohe3))
         self.assign_property("graph_size", [len(x) if x is not None else None for x in node_attributes])
 
         return self
 
+    @staticmethod
+    def _one_hot_per_graph(values: list, categories: np.ndarray):
+        r"""One-hot encode the node values of all graphs at once, which are then split again into graphs.
+        Values that are not in categories are encoded by zeros.
+
+        Args:
+            values (list): List of arrays with integer node values of shape `(N, )` for each graph.
+            categories (np.ndarray): Possible values for the one-hot encoding.
+
+        Returns:
+            list: List of one-hot encoded arrays of shape `(N, len(categories))` for each graph.
+        """
+        flat_values = np.concatenate([np.asarray(x).reshape(-1) for x in values]).astype("int64")
+        one_hot = (np.expand_dims(flat_values, axis=-1) == categories).astype("int64")
+        return np.split(one_hot, np.cumsum([len(x) for x in values])[:-1])
+
 # ds = PROTEINSDatset()
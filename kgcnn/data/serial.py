@@ -1,5 +1,8 @@
 import importlib
 import logging
+import hashlib
+import json
+import os
 from typing import Union
 
 try:
@@ -38,12 +41,28 @@ global_dataset_register = {
     "CrystalDataset": CrystalDataset
 }
 
+# Version of the dataset preprocessing for cached datasets. Must be increased if changes of the preprocessing in kgcnn
+# give different graphs, so that old cache files are not used anymore.
+global_dataset_cache_version = 1
+
 
 def deserialize(dataset: Union[str, dict]):
     r"""Deserialize a dataset class from dictionary including "class_name" and "config" keys.
     Furthermore, `prepare_data`, `read_in_memory` and `map_list` are possible for deserialization if manually
     set in 'methods' key as list.
 
+    If the key 'cache' is set to `True`, the dataset after running 'methods' is saved in `data_directory` to a
+    pickled file, which is named by a hash of the serialization, the size and modification time of `file_name`, the
+    modification time and number of entries of `file_directory` and the version of the preprocessing. On the next
+    deserialization with identical serialization and unchanged source files, the dataset is loaded from that file
+    instead of running 'methods' again. To invalidate the cache, simply delete the '*.kgcnn.pickle' files in
+    `data_directory` or remove 'cache' from the serialization.
+
+    .. note::
+        On loading from cache, 'methods' are skipped and only the list of graphs is restored. Any other attribute
+        that is set on the dataset by 'methods' is therefore missing. Changed file contents in `file_directory` are
+        not detected, if the files are only modified in place.
+
     Args:
         dataset (str, dict): Dictionary of the dataset serialization.
 
@@ -79,6 +98,14 @@ def deserialize(dataset: Union[str, dict]):
             raise NotImplementedError(
                 "Unknown identifier %s, which is not in the sub-classed modules in kgcnn.data.datasets" % dataset_name)
 
+    # Load preprocessed dataset from cache if possible.
+    cache_path = None
+    if dataset.get("cache", False):
+        cache_path = _cache_file_path(ds_instance, dataset)
+        if cache_path is not None and os.path.exists(cache_path):
+            module_logger.info("Load cached dataset from %s." % cache_path)
+            return ds_instance.load(cache_path)
+
     # Call class methods to load or process data.
     # Order is important here.
     if "methods" in dataset:
@@ -90,4 +117,40 @@ def deserialize(dataset: Union[str, dict]):
                 else:
                     ds_instance.error("Dataset class does not have property %s" % method)
 
+    if cache_path is not None:
+        module_logger.info("Cache dataset to %s." % cache_path)
+        ds_instance.save(cache_path)
+
     return ds_instance
+
+
+def _cache_file_path(ds_instance, dataset: dict):
+    """File path for cached dataset, which is keyed by a hash of the dataset serialization, the source files and the
+    preprocessing version."""
+    data_directory = getattr(ds_instance, "data_directory", None)
+    if data_directory is None:
+        module_logger.warning("Can not cache dataset without `data_directory`.")
+        return None
+    key = {"serialization": dataset, "version": global_dataset_cache_version,
+           "files": _source_files_fingerprint(ds_instance)}
+    key = hashlib.sha1(json.dumps(key, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+    name = ds_instance.dataset_name if ds_instance.dataset_name is not None else dataset["class_name"]
+    return os.path.join(ds_instance.data_directory, "%s_%s.kgcnn.pickle" % (name, key))
+
+
+def _source_files_fingerprint(ds_instance):
+    """Size and modification time of the dataset file and modification time and number of entries of the file directory
+    of the dataset. Files in the directory are not checked one by one, which would be slow for many files."""
+    fingerprint = {"file_name": None, "file_directory": None}
+    if getattr(ds_instance, "file_name", None) is not None:
+        file_path = os.path.join(ds_instance.data_directory, ds_instance.file_name)
+        if os.path.exists(file_path):
+            stat = os.stat(file_path)
+            fingerprint["file_name"] = [ds_instance.file_name, stat.st_size, stat.st_mtime_ns]
+    if getattr(ds_instance, "file_directory", None) is not None:
+        file_directory = os.path.join(ds_instance.data_directory, ds_instance.file_directory)
+        if os.path.isdir(file_directory):
+            stat = os.stat(file_directory)
+            fingerprint["file_directory"] = [ds_instance.file_directory, len(os.listdir(file_directory)),
+                                             stat.st_mtime_ns]
+    return fingerprint
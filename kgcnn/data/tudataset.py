@@ -1,6 +1,8 @@
 import numpy as np
+import pandas as pd
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 from kgcnn.data.base import MemoryGraphDataset
 
@@ -55,45 +57,27 @@ class GraphTUDataset(MemoryGraphDataset):
 
         self.info("Reading dataset to memory with name %s" % str(self.dataset_name))
 
+        # Read all files of the dataset concurrently. Labels and attributes are optional.
+        file_dtypes = {"A": int, "graph_indicator": int, "graph_labels": float, "node_labels": float,
+                       "edge_labels": float, "node_attributes": float, "edge_attributes": float,
+                       "graph_attributes": float}
+        with ThreadPoolExecutor() as executor:
+            file_arrays = dict(zip(file_dtypes.keys(), executor.map(
+                lambda x: self._read_txt_array(os.path.join(path, "%s_%s.txt" % (name_dataset, x[0])), dtype=x[1]),
+                file_dtypes.items())))
+
         # Define a graph with indices
         # They must be defined
-        g_a = np.array(self.read_csv_simple(os.path.join(path, name_dataset + "_A.txt"), dtype=int), dtype="int")
-        g_n_id = np.array(self.read_csv_simple(os.path.join(path, name_dataset + "_graph_indicator.txt"), dtype=int),
-                          dtype="int")
-
-        # Try read in labels and attributes (optional)
-        try:
-            g_labels = np.array(
-                self.read_csv_simple(os.path.join(path, name_dataset + "_graph_labels.txt"), dtype=float))
-        except FileNotFoundError:
-            g_labels = None
-        try:
-            n_labels = np.array(
-                self.read_csv_simple(os.path.join(path, name_dataset + "_node_labels.txt"), dtype=float))
-        except FileNotFoundError:
-            n_labels = None
-        try:
-            e_labels = np.array(
-                self.read_csv_simple(os.path.join(path, name_dataset + "_edge_labels.txt"), dtype=float))
-        except FileNotFoundError:
-            e_labels = None
-
-        # Try read in attributes
-        try:
-            n_attr = np.array(
-                self.read_csv_simple(os.path.join(path, name_dataset + "_node_attributes.txt"), dtype=float))
-        except FileNotFoundError:
-            n_attr = None
-        try:
-            e_attr = np.array(
-                self.read_csv_simple(os.path.join(path, name_dataset + "_edge_attributes.txt"), dtype=float))
-        except FileNotFoundError:
-            e_attr = None
-        try:
-            g_attr = np.array(
-                self.read_csv_simple(os.path.join(path, name_dataset + "_graph_attributes.txt"), dtype=float))
-        except FileNotFoundError:
-            g_attr = None
+        g_a, g_n_id = file_arrays["A"], file_arrays["graph_indicator"]
+        if g_a is None or g_n_id is None:
+            raise FileNotFoundError("Dataset %s requires '_A.txt' and '_graph_indicator.txt' files in %s." % (
+                name_dataset, path))
+        g_labels = file_arrays["graph_labels"]
+        n_labels = file_arrays["node_labels"]
+        e_labels = file_arrays["edge_labels"]
+        n_attr = file_arrays["node_attributes"]
+        e_attr = file_arrays["edge_attributes"]
+        g_attr = file_arrays["graph_attributes"]
 
         # labels
         num_graphs = np.amax(g_n_id)
@@ -164,6 +148,22 @@ class GraphTUDataset(MemoryGraphDataset):
 
         return self
 
+    @staticmethod
+    def _read_txt_array(filepath: str, delimiter: str = ",", dtype=float):
+        """Read a csv-file of a TUDataset into a numpy array with the C-engine of pandas.
+
+        Args:
+            filepath (str): Full filepath of csv-file to read in.
+            delimiter (str): Delimiter character for separation. Default is ",".
+            dtype: Type of the values. Default is float.
+
+        Returns:
+            np.ndarray: Array of values of shape `(lines, columns)` or None if the file does not exist.
+        """
+        if not os.path.exists(filepath):
+            return None
+        return pd.read_csv(filepath, sep=delimiter, header=None, dtype=dtype, skipinitialspace=True).to_numpy()
+
     @staticmethod
     def read_csv_simple(filepath: str, delimiter: str = ",", dtype=float):
         """Very simple python-only function to read in a csv-file from file.
@@ -154,7 +154,7 @@ def ragged_tensor_from_nested_numpy(numpy_list: list, dtype: str = "int64"):
         tf.RaggedTensor: Ragged tensor of former nested list of numpy arrays.
     """
     return tf.RaggedTensor.from_row_lengths(np.concatenate(numpy_list, axis=0),
-                                            np.array([len(x) for x in numpy_list], dtype=dtype))
+                                            np.fromiter(map(len, numpy_list), dtype=dtype, count=len(numpy_list)))
 
 
 def pandas_data_frame_columns_to_numpy(data_frame, label_column_name, print_context: str = ""):
@@ -8,7 +8,8 @@ def precompute_adjacency_scaled(adj_matrix, add_identity: bool = True):
     The node degree matrix is defined as :math:`D_{i,i} = \sum_{j} (A + I)_{i,j}`.
 
     Args:
-        adj_matrix (np.ndarray, scipy.sparse): Adjacency matrix :math:`A` of shape `(N, N)`.
+        adj_matrix (np.ndarray, scipy.sparse): Adjacency matrix :math:`A` of shape `(N, N)`. For numpy arrays also
+            a stack of padded adjacency matrices of shape `(..., N, N)` can be scaled at once.
         add_identity (bool, optional): Whether to add identity :math:`I` in :math:`(A + I)`. Defaults to True.
 
     Returns:
@@ -17,19 +18,16 @@ def precompute_adjacency_scaled(adj_matrix, add_identity: bool = True):
     if isinstance(adj_matrix, np.ndarray):
         adj_matrix = np.array(adj_matrix, dtype="float")
         if add_identity:
-            adj_matrix = adj_matrix + np.identity(adj_matrix.shape[0])
+            adj_matrix = adj_matrix + np.identity(adj_matrix.shape[-1])
         rowsum = np.sum(adj_matrix, axis=-1)
-        colsum = np.sum(adj_matrix, axis=0)
+        colsum = np.sum(adj_matrix, axis=-2)
         with np.errstate(divide='ignore', invalid='ignore'):
-            d_ii = np.power(rowsum, -0.5).flatten()
-            d_jj = np.power(colsum, -0.5).flatten()
+            d_ii = np.power(rowsum, -0.5)
+            d_jj = np.power(colsum, -0.5)
             d_ii = np.nan_to_num(d_ii, nan=0.0, posinf=0.0, neginf=0.0)
             d_jj = np.nan_to_num(d_jj, nan=0.0, posinf=0.0, neginf=0.0)
-        di = np.zeros((adj_matrix.shape[0], adj_matrix.shape[0]), dtype=adj_matrix.dtype)
-        dj = np.zeros((adj_matrix.shape[1], adj_matrix.shape[1]), dtype=adj_matrix.dtype)
-        di[np.arange(adj_matrix.shape[0]), np.arange(adj_matrix.shape[0])] = d_ii
-        dj[np.arange(adj_matrix.shape[1]), np.arange(adj_matrix.shape[1])] = d_jj
-        return np.matmul(di, np.matmul(adj_matrix, dj))
+        # Multiplying with diagonal matrices is equal to broadcasting the diagonal over rows and columns.
+        return np.expand_dims(d_ii, axis=-1) * adj_matrix * np.expand_dims(d_jj, axis=-2)
     elif isinstance(adj_matrix, (sp.bsr.bsr_matrix, sp.csc.csc_matrix, sp.coo.coo_matrix, sp.csr.csr_matrix)):
         adj = sp.coo_matrix(adj_matrix)
         if add_identity:
@@ -94,10 +92,8 @@ def convert_scaled_adjacency_to_list(adj_scaled):
     if isinstance(adj_scaled, np.ndarray):
         a = np.array(adj_scaled > 0, dtype="bool")
         edge_weight = adj_scaled[a]
-        index1 = np.tile(np.expand_dims(np.arange(0, a.shape[0]), axis=1), (1, a.shape[1]))
-        index2 = np.tile(np.expand_dims(np.arange(0, a.shape[1]), axis=0), (a.shape[0], 1))
-        index12 = np.concatenate([np.expand_dims(index1, axis=-1), np.expand_dims(index2, axis=-1)], axis=-1)
-        edge_index = index12[a]
+        # Nonzero returns indices in the same row-major order as boolean masking.
+        edge_index = np.stack(np.nonzero(a), axis=-1)
         return edge_index, edge_weight
     elif isinstance(adj_scaled, (sp.bsr.bsr_matrix, sp.csc.csc_matrix, sp.coo.coo_matrix, sp.csr.csr_matrix)):
         adj_scaled = adj_scaled.tocoo()
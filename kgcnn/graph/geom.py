@@ -1,11 +1,13 @@
 import numpy as np
+import warnings
+from scipy.spatial import cKDTree
 
 
 def coulomb_matrix_to_inverse_distance_proton(coulomb_mat: np.ndarray, unit_conversion: float = 1.0):
     r"""Convert a Coulomb matrix back to inverse distancematrix plus atomic number.
 
     Args:
-        coulomb_mat (np.ndarray): Coulomb matrix of shape (...,N,N)
+        coulomb_mat (np.ndarray): Coulomb matrix of shape (...,N,N). Can be a stack of matrices for the full dataset.
         unit_conversion (float) : Whether to scale units for distance. Default is 1.0.
 
     Returns:
@@ -14,59 +16,58 @@ def coulomb_matrix_to_inverse_distance_proton(coulomb_mat: np.ndarray, unit_conv
             - inv_dist (np.ndarray): Inverse distance Matrix of shape (...,N,N).
             - z (np.ndarray): Atom Number corresponding diagonal as proton number (..., N).
     """
-    indslie = np.arange(0, coulomb_mat.shape[-1])
-    z = coulomb_mat[..., indslie, indslie]
+    z = np.diagonal(coulomb_mat, axis1=-2, axis2=-1)
     z = np.power(2 * z, 1 / 2.4)
-    a = np.expand_dims(z, axis=len(z.shape) - 1)
-    b = np.expand_dims(z, axis=len(z.shape))
-    zz = a * b
+    zz = np.expand_dims(z, axis=-1) * np.expand_dims(z, axis=-2)
     c = coulomb_mat / zz
-    c[..., indslie, indslie] = 0
+    np.einsum("...ii->...i", c)[...] = 0
     c /= unit_conversion
-    z = np.array(np.round(z), dtype=np.int)
+    z = np.array(np.round(z), dtype="int32")
     return c, z
 
 
 def make_rotation_matrix(vector: np.ndarray, angle: float):
     r"""Generate rotation matrix around a given vector with a certain angle.
 
-    Only defined for 3 dimensions explicitly here.
+    Only defined for 3 dimensions explicitly here. Uses the Rodrigues formula
+    :math:`R = \cos(\theta) I + (1 - \cos(\theta)) k k^T + \sin(\theta) K` with the unit vector :math:`k` and its
+    cross-product matrix :math:`K`, which also works for a batch of vectors and angles.
 
     Args:
-        vector (np.ndarray, list): vector of rotation axis (3, ) with (x, y, z).
-        angle (value): angle in degrees ° to rotate around.
+        vector (np.ndarray, list): vector of rotation axis (3, ) with (x, y, z) or a batch of shape (..., 3).
+        angle (value): angle in degrees ° to rotate around or array of angles of shape (..., ).
 
     Returns:
-        np.ndarray: Rotation matrix :math:`R` of shape (3, 3) that performs the rotation for :math:`y = R x`.
+        np.ndarray: Rotation matrix :math:`R` of shape (..., 3, 3) that performs the rotation for :math:`y = R x`.
     """
-    angle = angle / 180.0 * np.pi
-    norm = (vector[0] ** 2.0 + vector[1] ** 2.0 + vector[2] ** 2.0) ** 0.5
-    direction = vector / norm
-    matrix = np.zeros((3, 3))
-    matrix[0][0] = direction[0] ** 2.0 * (1.0 - np.cos(angle)) + np.cos(angle)
-    matrix[1][1] = direction[1] ** 2.0 * (1.0 - np.cos(angle)) + np.cos(angle)
-    matrix[2][2] = direction[2] ** 2.0 * (1.0 - np.cos(angle)) + np.cos(angle)
-    matrix[0][1] = direction[0] * direction[1] * (1.0 - np.cos(angle)) - direction[2] * np.sin(angle)
-    matrix[1][0] = direction[0] * direction[1] * (1.0 - np.cos(angle)) + direction[2] * np.sin(angle)
-    matrix[0][2] = direction[0] * direction[2] * (1.0 - np.cos(angle)) + direction[1] * np.sin(angle)
-    matrix[2][0] = direction[0] * direction[2] * (1.0 - np.cos(angle)) - direction[1] * np.sin(angle)
-    matrix[1][2] = direction[1] * direction[2] * (1.0 - np.cos(angle)) - direction[0] * np.sin(angle)
-    matrix[2][1] = direction[1] * direction[2] * (1.0 - np.cos(angle)) + direction[0] * np.sin(angle)
-    return matrix
+    angle = np.asarray(angle) / 180.0 * np.pi
+    vector = np.asarray(vector)
+    direction = vector / np.linalg.norm(vector, axis=-1, keepdims=True)
+    cos_a = np.expand_dims(np.cos(angle), axis=(-2, -1))
+    sin_a = np.expand_dims(np.sin(angle), axis=(-2, -1))
+    kx, ky, kz = direction[..., 0], direction[..., 1], direction[..., 2]
+    zero = np.zeros_like(kx)
+    cross_k = np.stack([np.stack([zero, -kz, ky], axis=-1),
+                        np.stack([kz, zero, -kx], axis=-1),
+                        np.stack([-ky, kx, zero], axis=-1)], axis=-2)
+    outer_k = np.einsum("...i,...j->...ij", direction, direction)
+    return cos_a * np.eye(3) + (1.0 - cos_a) * outer_k + sin_a * cross_k
 
 
 def rotate_to_principle_axis(coord: np.ndarray):
     r"""Rotate a point-cloud to its principle axis.
 
     This can be a molecule but also some general data.
-    It uses PCA via SVD from :obj:`numpy.linalg.svd`. PCA from scikit uses SVD too (:obj:`scipy.sparse.linalg`).
+    It uses PCA via eigen-decomposition of the symmetric covariance matrix with :obj:`numpy.linalg.eigh`, which gives
+    the same principle axis as SVD but exploits symmetry. Like for SVD, the sign of each axis is not unique.
 
     .. note::
-        The data is centered before SVD but shifted back at the output.
+        The data is centered before eigen-decomposition but shifted back at the output.
 
     Args:
         coord (np.array): Array of points forming a pointcloud. Important: coord has shape (N,p)
-            where N is the number of samples and p is the feature/coordinate dimension e.g. 3 for x,y,z
+            where N is the number of samples and p is the feature/coordinate dimension e.g. 3 for x,y,z.
+            Can also be a batch of equally sized point-clouds of shape (...,N,p).
 
     Returns:
         tuple: [R, rotated]
@@ -74,19 +75,22 @@ def rotate_to_principle_axis(coord: np.ndarray):
             - R (np.array): Rotation matrix of shape (p, p) if input has (N,p)
             - rotated (np.array): Rotated point-could of coord that was the input.
     """
-    centroid_c = np.mean(coord, axis=0)
+    coord = np.asarray(coord)
+    centroid_c = np.mean(coord, axis=-2, keepdims=True)
     sm = coord - centroid_c
-    zzt = (np.dot(sm.T, sm))  # Calculate covariance matrix
-    u, s, vh = np.linalg.svd(zzt)
-    # Alternatively SVD of coord with onyly compute vh but not possible for numpy/scipy.
-    rotated = np.dot(sm, vh.T)
+    zzt = np.matmul(np.swapaxes(sm, -1, -2), sm)  # Calculate covariance matrix
+    _, v = np.linalg.eigh(zzt)
+    # Eigenvalues of eigh are in ascending order, but principle axis should be in descending order like for SVD.
+    v = np.flip(v, axis=-1)
+    vh = np.swapaxes(v, -1, -2)
+    rotated = np.matmul(sm, v)
     rot_shift = rotated + centroid_c
     return vh, rot_shift
 
 
 def rigid_transform(a: np.ndarray, b: np.ndarray, correct_reflection: bool = False):
     r"""Rotate and shift point-cloud A to point-cloud B. This should implement Kabsch algorithm.
-    May also work for input of shape `(...,N,3)` but is not tested.
+    Also works for a batch of point-clouds of shape `(...,N,3)` with a single batched SVD.
     Explanation of Kabsch Algorithm: https://en.wikipedia.org/wiki/Kabsch_algorithm
     For further literature:
     https://link.springer.com/article/10.1007/s10015-016-0265-x
@@ -95,7 +99,8 @@ def rigid_transform(a: np.ndarray, b: np.ndarray, correct_reflection: bool = Fal
 
     .. note::
         The numbering of points of A and B must match; not for shuffled point-cloud.
-        This works for 3 dimensions only. Uses SVD.
+        This works for 3 dimensions only. Uses SVD. If a reflection with :math:`det(R)<0` is found, a
+        :obj:`RuntimeWarning` is issued.
 
     Args:
         a (np.ndarray): list of points (N,3) to rotate (and translate)
@@ -109,32 +114,29 @@ def rigid_transform(a: np.ndarray, b: np.ndarray, correct_reflection: bool = Fal
             - R (np.ndarray): Rotation matrix
             - t (np.ndarray): translation from A to B
     """
-    a = np.transpose(np.array(a))
-    b = np.transpose(np.array(b))
-    centroid_a = np.mean(a, axis=1)
-    centroid_b = np.mean(b, axis=1)
-    am = a - np.expand_dims(centroid_a, axis=1)
-    bm = b - np.expand_dims(centroid_b, axis=1)
-    h = np.dot(am, np.transpose(bm))
+    a = np.array(a)
+    b = np.array(b)
+    centroid_a = np.mean(a, axis=-2, keepdims=True)  # (...,1,3)
+    centroid_b = np.mean(b, axis=-2, keepdims=True)  # (...,1,3)
+    am = a - centroid_a
+    bm = b - centroid_b
+    h = np.matmul(np.swapaxes(am, -1, -2), bm)
     u, s, vt = np.linalg.svd(h)
-    r = np.dot(vt.T, u.T)
+    r = np.matmul(np.swapaxes(vt, -1, -2), np.swapaxes(u, -1, -2))
     d = np.linalg.det(r)
-    if d < 0:
-        print("Warning: det(R)<0, det(R)=", d)
+    if np.any(d < 0):
+        warnings.warn("Found reflection for rigid transform with det(R)<0.", RuntimeWarning)
         if correct_reflection:
-            print("Correcting R...")
-            vt[-1, :] *= -1
-            r = np.dot(vt.T, u.T)
-    bout = np.dot(r, am) + np.expand_dims(centroid_b, axis=1)
-    bout = np.transpose(bout)
-    t = np.expand_dims(centroid_b - np.dot(r, centroid_a), axis=0)
-    t = t.T
+            vt[..., -1, :] *= np.expand_dims(np.where(d < 0, -1.0, 1.0), axis=-1)
+            r = np.matmul(np.swapaxes(vt, -1, -2), np.swapaxes(u, -1, -2))
+    bout = np.matmul(am, np.swapaxes(r, -1, -2)) + centroid_b
+    t = np.swapaxes(centroid_b, -1, -2) - np.matmul(r, np.swapaxes(centroid_a, -1, -2))
     return bout, r, t
 
 
 def coordinates_from_distance_matrix(distance: np.ndarray, use_center: bool = None, dim: int = 3):
     r"""Compute list of coordinates from a distance matrix of shape `(N, N)`.
-    May also work for input of shape `(..., N, N)` but is not tested.
+    Also works for a stack of distance matrices of shape `(..., N, N)` with a single batched SVD.
     Uses vectorized Alogrithm:
     http://scripts.iucr.org/cgi-bin/paper?S0567739478000522
     https://www.researchgate.net/publication/252396528_Stable_calculation_of_coordinates_from_distance_information
@@ -154,14 +156,15 @@ def coordinates_from_distance_matrix(distance: np.ndarray, use_center: bool = No
     if use_center is None:
         # Take Center of mass (slightly changed for vectorization assuming d_ii = 0)
         di2 = np.square(distance)
-        di02 = 1 / 2 / dim_in / dim_in * (2 * dim_in * np.sum(di2, axis=-1) - np.sum(np.sum(di2, axis=-1), axis=-1))
+        di02 = 1 / 2 / dim_in / dim_in * (
+                2 * dim_in * np.sum(di2, axis=-1) - np.sum(di2, axis=(-2, -1), keepdims=True)[..., 0])
         mat_m = (np.expand_dims(di02, axis=-2) + np.expand_dims(di02, axis=-1) - di2) / 2  # broadcasting
     else:
         di2 = np.square(distance)
         mat_m = (np.expand_dims(di2[..., use_center], axis=-2) + np.expand_dims(di2[..., use_center],
                                                                                 axis=-1) - di2) / 2
     u, s, v = np.linalg.svd(mat_m)
-    vecs = np.matmul(u, np.sqrt(np.diag(s)))  # EV are sorted by default
+    vecs = u * np.expand_dims(np.sqrt(s), axis=-2)  # EV are sorted by default, equal to u @ diag(sqrt(s))
     distout = vecs[..., 0:dim]
     return distout
 
@@ -183,17 +186,19 @@ def range_neighbour_lattice(coordinates: np.ndarray, lattice: np.ndarray,
     Returns:
         list: [indices, images, dist]
     """
+    # Single precision is sufficient for atomic coordinates and halves the memory of all intermediates.
+    coordinates = np.asarray(coordinates, dtype="float32")
+    lattice = np.asarray(lattice, dtype="float32")
     lattice_col = np.transpose(lattice)
     lattice_row = lattice
 
-    # Index list for nodes
-    node_index = np.expand_dims(np.arange(0, len(coordinates)), axis=1)  # Nx1
-
     # Mesh Grid list
     def mesh_grid_list(bound_left, bound_right):
-        pos = [np.arange(i, j+1, 1) for i, j in zip(bound_left, bound_right)]
-        grid_list = np.array(np.meshgrid(*pos)).T.reshape(-1, 3)
-        return grid_list
+        # Same ordering as the transposed 'xy' meshgrid, i.e. z-, x-, y-axis from slowest to fastest.
+        grid = np.mgrid[bound_left[2]:bound_right[2]+1, bound_left[0]:bound_right[0]+1,
+                        bound_left[1]:bound_right[1]+1].astype("int32")
+        grid = grid[[1, 2, 0]].reshape(3, -1)
+        return grid[:, np.any(grid != 0, axis=0)].T  # Remove center cell
 
     # Diagonals of unit cell
     center_unit_cell = np.sum(lattice_row, axis=0, keepdims=True) / 2  # (1, 3)
@@ -206,9 +211,7 @@ def range_neighbour_lattice(coordinates: np.ndarray, lattice: np.ndarray,
     bounding_box_index = np.ceil(bounding_box_index).astype("int")
 
     bounding_grid = mesh_grid_list(-bounding_box_index, bounding_box_index)
-    bounding_grid = bounding_grid[
-        np.logical_not(np.all(bounding_grid == np.array([[0, 0, 0]]), axis=-1))]  # Remove center cell
-    bounding_grid_real = np.dot(bounding_grid, lattice_row)
+    bounding_grid_real = np.dot(bounding_grid.astype(lattice_row.dtype), lattice_row)
     dist_centers = np.sqrt(np.sum(np.square(bounding_grid_real), axis=-1))
     mask_centers = dist_centers <= max_distance + max_radius_cell
     images = bounding_grid[mask_centers]
@@ -224,63 +227,29 @@ def range_neighbour_lattice(coordinates: np.ndarray, lattice: np.ndarray,
     # ax.add_patch(circle)
     # plt.show()
 
-    num_images = images.shape[0]
-    images = np.expand_dims(images, axis=0)  # 1xCx3
-    images = np.repeat(images, len(coordinates), axis=0)  # NxCx3
+    # All candidate positions: central cell first, followed by the images of every node, i.e. (N+N*C)x3.
+    num_nodes = len(coordinates)
     coord_images = np.expand_dims(coordinates, axis=1) + shifts  # NxCx3
-    coord_images = np.reshape(coord_images, (-1, 3))  # (N*C)x3
-    images = np.reshape(images, (-1, 3))  # (N*C)x3
-    indices = np.expand_dims(np.repeat(node_index, num_images), axis=-1)  # (N*C)x1
-
-    # Center cell distance
-    center_indices = np.indices((len(node_index), len(node_index)))
-    center_indices = center_indices.transpose(np.append(np.arange(1, 3), 0))  # NxNx2
-    center_dist = np.expand_dims(coordinates, axis=0) - np.expand_dims(coordinates, axis=1)  # NxNx3
-    center_image = np.zeros(center_dist.shape)
+    coord_all = np.concatenate([coordinates, np.reshape(coord_images, (-1, 3))], axis=0)
+    index_all = np.concatenate([np.arange(num_nodes), np.repeat(np.arange(num_nodes), len(images))], axis=0)
+    image_all = np.concatenate([np.zeros((num_nodes, 3)), np.tile(images, (num_nodes, 1))], axis=0).astype("float32")
+
+    # Query neighbours per central node with KD-trees instead of a dense Nx(N*C+1) distance matrix.
+    # All pairs within max_distance are enumerated in compiled code without python loops over nodes.
+    pairs = cKDTree(coordinates).sparse_distance_matrix(cKDTree(coord_all), max_distance, output_type="ndarray")
+    row, col, dist = pairs["i"], pairs["j"], pairs["v"].astype(coordinates.dtype)
     if not self_loops:
-        def remove_self_loops(x):
-            m = np.logical_not(np.eye(len(x), dtype="bool"))
-            x_shape = np.array(x.shape)
-            x_shape[1] -= 1
-            return np.reshape(x[m], x_shape)
-
-        center_indices = remove_self_loops(center_indices)
-        center_image = remove_self_loops(center_image)
-        center_dist = remove_self_loops(center_dist)
-
-    # Make arrays of Nx(NxC)
-    dist = np.expand_dims(coord_images, axis=0) - np.expand_dims(coordinates, axis=1)  # Nx(N*C)x3
-    dist_indices = np.concatenate(
-        [np.repeat(np.expand_dims(node_index, axis=1), len(indices), axis=1),
-         np.repeat(np.expand_dims(indices, axis=0), len(node_index), axis=0)], axis=-1)  # Nx(N*C)x2
-    dist_images = np.repeat(np.expand_dims(images, axis=0), len(node_index), axis=0)  # Nx(N*C)x3
-
-    # Adding Center image as matrix for shape Nx(NxC+1)
-    dist_indices = np.concatenate([center_indices, dist_indices], axis=1)  # Nx(N*C+1)x2
-    dist_images = np.concatenate([center_image, dist_images], axis=1)  # Nx(N*C+1)x2
-    dist = np.concatenate([center_dist, dist], axis=1)  # Nx(N*C+1)x3
-
-    # Distance in real space.
-    dist = np.sqrt(np.sum(np.square(dist), axis=-1))  # Nx(N*C+1)
-
-    # Sorting for distance in real space
+        mask = col != row
+        row, col, dist = row[mask], col[mask], dist[mask]
+
+    # Sorting for distance in real space per central node, otherwise keep order of candidates.
     if sort_distance:
-        arg_sort = np.argsort(dist, axis=-1)
-        dist_sort = np.take_along_axis(dist, arg_sort, axis=1)
-        dist_indices_sort = np.take_along_axis(
-            dist_indices, np.repeat(np.expand_dims(arg_sort, axis=2), dist_indices.shape[2], axis=2), axis=1)
-        dist_images_sort = np.take_along_axis(
-            dist_images, np.repeat(np.expand_dims(arg_sort, axis=2), dist_images.shape[2], axis=2), axis=1)
+        arg_sort = np.lexsort((col, dist, row))
     else:
-        dist_sort = dist
-        dist_images_sort = dist_images
-        dist_indices_sort = dist_indices
-
-    mask = dist_sort <= max_distance
+        arg_sort = np.lexsort((col, row))
 
-    # Selected atoms
-    out_dist = dist_sort[mask]
-    out_images = dist_images_sort[mask]
-    out_indices = dist_indices_sort[mask]
+    out_dist = dist[arg_sort]
+    out_images = image_all[col[arg_sort]]
+    out_indices = np.stack([row[arg_sort], index_all[col[arg_sort]]], axis=-1)
 
     return [out_indices, out_images, out_dist]
\ No newline at end of file
@@ -128,6 +128,9 @@ class HyperParameter:
         hyper_compile_additional = {key: value for key, value in hyper_compile.items() if
                                     key not in reserved_compile_arguments}
         if "optimizer" in hyper_compile:
+            if "Addons>" in str(hyper_compile["optimizer"]):
+                # Optimizers of tensorflow_addons are only registered on import, which is slow and not always needed.
+                import tensorflow_addons  # noqa
             try:
                 optimizer = tf.keras.optimizers.get(hyper_compile['optimizer'])
             except:
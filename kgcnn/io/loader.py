@@ -106,3 +106,54 @@ class NumpyTensorList:
         self._length_test()
         return len(self._tensor_list[0])
 
+
+def tf_dataset_from_tensors(x, y=None, batch_size: int = None, shuffle: bool = False, seed: int = None,
+                            indices=None):
+    r"""Make a batched :obj:`tf.data.Dataset` from a list of (ragged) model input tensors and optional labels,
+    which can be passed directly to `fit` or `predict` of a keras model.
+
+    The tensors are not sliced into single samples. Only the sample indices are shuffled and batched, and each batch
+    is gathered with one :obj:`tf.gather` from the full tensors. For ragged tensors with ragged rank of one this
+    directly operates on the flat values and row partition, i.e. the disjoint representation of the graphs.
+    The next batch is prefetched during the training step.
+
+    With :obj:`indices` only a subset of the samples is drawn, e.g. for a train or test split, without making copies
+    of the tensors for each split.
+
+    .. code-block:: python
+
+        import numpy as np
+        import tensorflow as tf
+        x = [tf.ragged.constant([[[0.0]], [[1.0], [2.0]]], ragged_rank=1)]
+        ds = tf_dataset_from_tensors(x, np.array([[1.0], [2.0]]), batch_size=2, shuffle=True)
+        print(ds.element_spec)
+
+    Args:
+        x (list, tf.Tensor, tf.RaggedTensor): Tensor or list of tensors for model input of shape `(batch, ...)`.
+        y (np.ndarray, tf.Tensor): Labels of shape `(batch, ...)`. Default is None.
+        batch_size (int): Batch size. Default is None, which means 32 like keras `fit`.
+        shuffle (bool): Whether to shuffle the samples before batching in each epoch. Default is False.
+        seed (int): Random seed for shuffle. Default is None.
+        indices (np.ndarray, list): Indices of the samples to draw from the tensors. Default is None, which means all
+            samples.
+
+    Returns:
+        tf.data.Dataset: Batched and prefetched dataset.
+    """
+    if batch_size is None:
+        batch_size = 32
+    inputs = tuple(x) if isinstance(x, (list, tuple)) else x
+    # Keras unpacks tuple elements as (x, y, sample_weight). Inputs alone must therefore be nested in a tuple.
+    data = (inputs, ) if y is None else (inputs, tf.convert_to_tensor(y))
+    if indices is None:
+        num_samples = int(tf.nest.flatten(inputs)[0].shape[0])
+        ds = tf.data.Dataset.range(num_samples)
+    else:
+        num_samples = len(indices)
+        ds = tf.data.Dataset.from_tensor_slices(np.asarray(indices, dtype="int64"))
+    if shuffle:
+        ds = ds.shuffle(num_samples, seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size)
+    ds = ds.map(lambda index: tf.nest.map_structure(lambda t: tf.gather(t, index), data),
+                num_parallel_calls=tf.data.AUTOTUNE)
+    return ds.prefetch(tf.data.AUTOTUNE)
@@ -319,10 +319,11 @@ class GatherState(GraphBaseLayer):
         dyn_inputs = inputs[1]
 
         if isinstance(dyn_inputs, tf.RaggedTensor):
-            target_len = dyn_inputs.row_lengths()
-        else:
-            target_len = tf.repeat(tf.shape(dyn_inputs)[1], tf.shape(dyn_inputs)[0])
+            # Direct indexed gather of the state for each node, instead of repeat with row lengths.
+            out = tf.gather(env, dyn_inputs.value_rowids(), axis=0)
+            return tf.RaggedTensor.from_row_splits(out, dyn_inputs.row_splits, validate=self.ragged_validate)
 
+        target_len = tf.repeat(tf.shape(dyn_inputs)[1], tf.shape(dyn_inputs)[0])
         out = tf.repeat(env, target_len, axis=0)
         out = tf.RaggedTensor.from_row_lengths(out, target_len, validate=self.ragged_validate)
         return out
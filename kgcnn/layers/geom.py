@@ -4,6 +4,7 @@ from kgcnn.layers.base import GraphBaseLayer
 from kgcnn.layers.gather import GatherNodesSelection, GatherState
 from kgcnn.layers.modules import LazySubtract, LazyMultiply, LazyAdd
 from kgcnn.ops.axis import get_positive_axis
+from kgcnn.ops.partition import partition_row_indexing
 ks = tf.keras
 
 
@@ -305,6 +306,75 @@ class NodeDistanceEuclidean(GraphBaseLayer):
         return self.layer_euclidean_norm(diff)
 
 
+@ks.utils.register_keras_serializable(package='kgcnn', name='EdgeDistanceEuclidean')
+class EdgeDistanceEuclidean(GraphBaseLayer):
+    r"""Compute euclidean distance between the node positions of each edge directly from edge indices.
+
+    Equivalent to :obj:`NodePosition` followed by :obj:`NodeDistanceEuclidean`, but for ragged tensors of
+    ragged rank one, both nodes of an edge are gathered at once from the flat values and the distance is reduced
+    without keeping separate position tensors for each index.
+
+    .. code-block:: python
+
+        position = tf.ragged.constant([[[0.0, -1.0, 0.0],[1.0, 1.0, 0.0]]], ragged_rank=1)
+        indices = tf.ragged.constant([[[0,1],[1,0]]], ragged_rank=1)
+        print(EdgeDistanceEuclidean()([position, indices]))
+    """
+
+    def __init__(self, selection_index: list = None, **kwargs):
+        r"""Initialize layer instance of :obj:`EdgeDistanceEuclidean`.
+
+        Args:
+            selection_index (list): Positions (last dimension of the index tensor) of the two nodes of an edge.
+                Default is [0, 1].
+        """
+        super(EdgeDistanceEuclidean, self).__init__(**kwargs)
+        if selection_index is None:
+            selection_index = [0, 1]
+        self.selection_index = selection_index
+        self.layer_node_position = NodePosition(self.selection_index)
+        self.layer_distance = NodeDistanceEuclidean()
+
+    def build(self, input_shape):
+        """Build layer."""
+        super(EdgeDistanceEuclidean, self).build(input_shape)
+
+    def call(self, inputs, **kwargs):
+        r"""Forward pass.
+
+        Args:
+            inputs (list): [position, edge_index]
+
+                - position (tf.RaggedTensor): Node positions of shape `(batch, [N], 3)`.
+                - edge_index (tf.RaggedTensor): Edge indices referring to nodes of shape `(batch, [M], 2)`.
+
+        Returns:
+            tf.RaggedTensor: Distances as edges that match the number of indices of shape `(batch, [M], 1)`
+        """
+        if all([isinstance(x, tf.RaggedTensor) for x in inputs]):
+            if all([x.ragged_rank == 1 for x in inputs]):
+                xyz, node_part = inputs[0].values, inputs[0].row_splits
+                edge_index, edge_part = inputs[1].values, inputs[1].row_lengths()
+                indexlist = partition_row_indexing(tf.gather(edge_index, self.selection_index, axis=1),
+                                                   node_part, edge_part,
+                                                   partition_type_target="row_splits",
+                                                   partition_type_index="row_length",
+                                                   to_indexing='batch',
+                                                   from_indexing=self.node_indexing)
+                pos = tf.gather(xyz, indexlist, axis=0)
+                diff = pos[:, 0] - pos[:, 1]
+                out = tf.sqrt(tf.nn.relu(tf.reduce_sum(tf.square(diff), axis=-1, keepdims=True)))
+                return tf.RaggedTensor.from_row_lengths(out, edge_part, validate=self.ragged_validate)
+        # Default fall-back via separate node positions.
+        return self.layer_distance(self.layer_node_position(inputs, **kwargs), **kwargs)
+
+    def get_config(self):
+        """Update config."""
+        config = super(EdgeDistanceEuclidean, self).get_config()
+        config.update({"selection_index": self.selection_index})
+        return config
+
+
 @ks.utils.register_keras_serializable(package='kgcnn', name='EdgeDirectionNormalized')
 class EdgeDirectionNormalized(GraphBaseLayer):
     r"""Compute the normalized geometric direction between two point coordinates for e.g. a geometric edge.
@@ -527,9 +597,9 @@ class GaussBasisLayer(GraphBaseLayer):
         Returns:
             tf.Tensor: Distance tensor expanded in Gaussian.
         """
-        gbs = tf.range(0, bins, 1, dtype=inputs.dtype) / float(bins) * distance
-        out = inputs - offset
-        out = tf.square(out - gbs) * (gamma * (-1.0))
+        # Shift the centers instead of the distances, which saves one pass over the edge tensor.
+        gbs = tf.constant(np.arange(0, bins) / float(bins) * distance + offset, dtype=inputs.dtype)
+        out = tf.square(inputs - gbs) * (gamma * (-1.0))
         out = tf.exp(out)
         return out
 
@@ -841,6 +911,6 @@ class FracToRealCoordinates(GraphBaseLayer):
     def call(self, inputs, **kwargs):
         frac_coords = inputs[0]
         lattice_matrices = inputs[1]
-        lattice_matrices_ = tf.repeat(lattice_matrices, frac_coords.row_lengths(), axis=0)
+        lattice_matrices_ = tf.gather(lattice_matrices, frac_coords.value_rowids(), axis=0)
         real_coords = tf.einsum('ij,ikj->ik', frac_coords.values,  lattice_matrices_)
         return tf.RaggedTensor.from_row_splits(real_coords, frac_coords.row_splits, validate=self.ragged_validate)
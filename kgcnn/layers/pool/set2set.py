@@ -1,6 +1,5 @@
 import tensorflow as tf
 import tensorflow.keras as ks
-import tensorflow.keras.backend as ksb
 
 from kgcnn.layers.base import GraphBaseLayer
 
@@ -14,13 +13,16 @@ class PoolingSet2Set(GraphBaseLayer):
     """Pooling Node or edge embeddings by the Set2Set encoder part from layer.
     This was first proposed by `NMPNN <http://arxiv.org/abs/1704.01212>`_ .
     The Reading to Memory has to be handled separately.
-    Uses a keras LSTM layer for the updates.
+    Uses a keras LSTM cell for the updates.
     
     Args:
         channels (int): Number of channels for the LSTM update.
         T (int): Numer of iterations. Default is T=3.
         pooling_method : Pooling method for PoolingSet2Set. Default is 'mean'.
         init_qstar: How to generate the first q_star vector. Default is 'mean'.
+        unroll_iterations (bool): If True, the `T` iterations of Set2Set will be unrolled, else a symbolic loop
+            will be used. Unrolling can speed-up the pooling for small `T`, although it tends to be more
+            memory-intensive. Default is False.
         activation: Activation function to use.
             Default: hyperbolic tangent (`tanh`). If you pass `None`, no activation
             is applied (ie. "linear" activation: `a(x) = x`).
@@ -44,7 +46,7 @@ class PoolingSet2Set(GraphBaseLayer):
             `recurrent_kernel` weights matrix. Default: `None`.
             bias_regularizer: Regularizer function applied to the bias vector. Default:
             `None`.
-        activity_regularizer: Regularizer function applied to the output of the
+        activity_regularizer: (Ignored) Regularizer function applied to the output of the
             layer (its "activation"). Default: `None`.
         kernel_constraint: Constraint function applied to the `kernel` weights
             matrix. Default: `None`.
@@ -56,16 +58,16 @@ class PoolingSet2Set(GraphBaseLayer):
             transformation of the inputs. Default: 0.
             recurrent_dropout: Float between 0 and 1. Fraction of the units to drop for
             the linear transformation of the recurrent state. Default: 0.
-        return_sequences: Boolean. Whether to return the last output. in the output
+        return_sequences: (Ignored) Boolean. Whether to return the last output. in the output
             sequence, or the full sequence. Default: `False`.
-        return_state: Boolean. Whether to return the last state in addition to the
+        return_state: (Ignored) Boolean. Whether to return the last state in addition to the
             output. Default: `False`.
-        go_backwards: Boolean (default `False`). If True, process the input sequence
+        go_backwards: (Ignored) Boolean (default `False`). If True, process the input sequence
             backwards and return the reversed sequence.
-        stateful: Boolean (default `False`). If True, the last state for each sample
+        stateful: (Ignored) Boolean (default `False`). If True, the last state for each sample
             at index i in a batch will be used as initial state for the sample of
             index i in the following batch.
-        time_major: The shape format of the `inputs` and `outputs` tensors.
+        time_major: (Ignored) The shape format of the `inputs` and `outputs` tensors.
             If True, the inputs and outputs will be in shape
             `[timesteps, batch, feature]`, whereas in the False case, it will be
             `[batch, timesteps, feature]`. Using `time_major = True` is a bit more
@@ -73,7 +75,7 @@ class PoolingSet2Set(GraphBaseLayer):
             RNN calculation. However, most TensorFlow data is batch-major, so by
             default this function accepts input and emits output in batch-major
             form.
-        unroll: Boolean (default `False`). If True, the network will be unrolled,
+        unroll: (Ignored) Boolean (default `False`). If True, the network will be unrolled,
             else a symbolic loop will be used. Unrolling can speed-up a RNN, although
             it tends to be more memory-intensive. Unrolling is only suitable for short
             sequences.
@@ -85,6 +87,7 @@ class PoolingSet2Set(GraphBaseLayer):
                  T=3,
                  pooling_method='mean',
                  init_qstar='mean',
+                 unroll_iterations=False,
                  # Args for LSTM
                  activation="tanh",
                  recurrent_activation="sigmoid",
@@ -118,10 +121,11 @@ class PoolingSet2Set(GraphBaseLayer):
         self.pooling_method = pooling_method
         self.init_qstar = init_qstar
 
+        # Pooling of m*q over features as row-wise dot product, without materializing the product m*q.
         if self.pooling_method == 'mean':
-            self._pool = ksb.mean
+            self._pool = lambda fm, fq: tf.einsum("nf,nf->n", fm, fq) / tf.cast(tf.shape(fm)[1], dtype=fm.dtype)
         elif self.pooling_method == 'sum':
-            self._pool = ksb.sum
+            self._pool = lambda fm, fq: tf.einsum("nf,nf->n", fm, fq)
         else:
             raise TypeError("ERROR:kgcnn: Unknown pooling, choose: 'mean', 'sum', ...")
 
@@ -131,7 +135,16 @@ class PoolingSet2Set(GraphBaseLayer):
             self.qstar0 = self.init_qstar_0
         # ...
 
-        # LSTM Layer to run on m
+        # LSTM to run on m. Since the input is only a single step, the LSTM cell is called directly in `call`, but
+        # it is kept wrapped in the LSTM layer so that weights are still tracked as `lay_lstm.cell` for checkpoints.
+        self.unroll_iterations = unroll_iterations
+        ignored_lstm_args = {"activity_regularizer": activity_regularizer, "return_sequences": return_sequences,
+                             "return_state": return_state, "go_backwards": go_backwards, "stateful": stateful,
+                             "time_major": time_major, "unroll": unroll}
+        for key, value in ignored_lstm_args.items():
+            if value:
+                print("Warning: Argument '%s' of layer %s is ignored, since LSTM cell is called on a single step." % (
+                    key, self.name))
         self.lay_lstm = ks.layers.LSTM(channels,
                                        activation=activation,
                                        recurrent_activation=recurrent_activation,
@@ -155,13 +168,18 @@ class PoolingSet2Set(GraphBaseLayer):
                                        go_backwards=go_backwards,
                                        stateful=stateful,
                                        time_major=time_major,
-                                       unroll=unroll
+                                       unroll=unroll,
+                                       # Keep recurrent state in variable dtype, e.g. float32 for mixed precision.
+                                       dtype=self.dtype
                                        )
 
     def build(self, input_shape):
         """Build layer."""
+        # Build LSTM here, so that no variables are created when tracing `call` as `tf.function`.
+        self.lay_lstm.build(tf.TensorShape([None, 1, 2 * self.channels]))
         super(PoolingSet2Set, self).build(input_shape)
 
+    @tf.function
     def call(self, inputs, **kwargs):
         """Forward pass.
 
@@ -174,32 +192,38 @@ class PoolingSet2Set(GraphBaseLayer):
             tf.Tensor: Pooled tensor q_star of shape (batch, 1, 2*channels)
         """
         self.assert_ragged_input_rank(inputs)
+        # Use int32 for the row partition, which is sufficient for batch index and faster for segment operations.
+        inputs = inputs.with_row_splits_dtype(tf.int32)
         x, batch_num, batch_index = inputs.values, inputs.row_lengths(), inputs.value_rowids()
 
         # Reading to memory removed here, is to be done by separately
         m = x  # (batch*None, feat)
 
-        # Initialize q0 and r0
-        qstar = self.qstar0(m, batch_index, batch_num)
+        # Initialize q0 and r0. Batch size and index are loop invariants, which are computed only once.
+        num_segments = inputs.nrows(out_type=batch_index.dtype)
+        qstar = self.qstar0(m, batch_index, batch_num, num_segments)
 
-        # start loop
-        for i in range(0, self.T):
-            q = self.lay_lstm(qstar)  # (batch,feat)
-            qt = tf.repeat(q, batch_num, axis=0)  # (batch*num,feat)
-            et = self.f_et(m, qt)  # (batch*num,)
-            # get at = exp(et)/sum(et) with sum(et)
-            at = ksb.exp(et - self.get_scale_per_sample(et, batch_index, batch_num))  # (batch*num,)
-            norm = self.get_norm(at, batch_index, batch_num)  # (batch*num,)
-            at = norm * at  # (batch*num,) x (batch*num,)
-            # calculate rt
-            at = ksb.expand_dims(at, axis=1)
-            rt = m * at  # (batch*num,feat) x (batch*num,1)
-            rt = tf.math.segment_sum(rt, batch_index)  # (batch,feat)
+        # The LSTM is applied to a single step from zero state in each iteration.
+        state0 = [tf.zeros((num_segments, self.channels), dtype=qstar.dtype)] * 2
+
+        def body(i, qstar):
+            q, _ = self.lay_lstm.cell(qstar, state0, training=kwargs.get("training"))  # (batch,feat)
+            rt = self.f_rt(m, q, batch_index, num_segments)  # (batch,feat)
             # qstar = [q,r]
-            qstar = ksb.concatenate([q, rt], axis=1)  # (batch,2*feat)
-            qstar = ksb.expand_dims(qstar, axis=1)  # (batch,1,2*feat)
+            return i + 1, tf.concat([q, rt], axis=1)
+
+        if self.unroll_iterations:
+            # Number of iterations is fixed, so that the loop can be unrolled in the graph with static shapes.
+            for i in range(self.T):
+                _, qstar = body(i, qstar)
+        else:
+            # start loop as symbolic while loop, so that the iterations are not unrolled in the graph.
+            _, qstar = tf.while_loop(lambda i, _: i < self.T, body, (tf.constant(0), qstar),
+                                     shape_invariants=(tf.TensorShape([]),
+                                                       tf.TensorShape([None, 2 * self.channels])),
+                                     maximum_iterations=self.T)
 
-        return qstar
+        return tf.expand_dims(qstar, axis=1)  # (batch,1,2*feat)
 
     def f_et(self, fm, fq):
         """Function to compute scalar from m and q. Can apply sum or mean etc.
@@ -211,60 +235,61 @@ class PoolingSet2Set(GraphBaseLayer):
         Returns:
             tf.Tensor: et of shape (batch*N, )
         """
-        fet = self._pool(fm * fq, axis=1)  # (batch*N, 1)
+        fet = self._pool(fm, fq)  # (batch*N, )
         return fet
 
+    def f_rt(self, fm, fq, ind, num_segments):
+        """Function to compute the attention readout r from m and q. Computes the softmax of et per sample and
+        the weighted sum of m in one pass, where the softmax is normalized per sample and not per node.
+
+        Args:
+             fm (tf.Tensor): of shape (batch*N, feat)
+             fq (tf.Tensor): of shape (batch, feat)
+             ind (tf.Tensor): Batch assignment of shape (batch*N, )
+             num_segments (tf.Tensor): Number of samples in batch.
+
+        Returns:
+            tf.Tensor: rt of shape (batch, feat)
+        """
+        # For mixed precision, et is computed in compute dtype of m but softmax in dtype of q, which is the dtype of
+        # the LSTM state. The weights are cast back to the dtype of m for the weighted sum.
+        et = self.f_et(fm, tf.gather(tf.cast(fq, dtype=fm.dtype), ind, axis=0))  # (batch*N, )
+        et = tf.cast(et, dtype=fq.dtype)
+        et_max = tf.math.unsorted_segment_max(et, ind, num_segments)  # (batch, )
+        et_exp = tf.math.exp(et - tf.gather(et_max, ind, axis=0))  # (batch*N, )
+        norm = tf.math.unsorted_segment_sum(et_exp, ind, num_segments)  # (batch, )
+        rt = tf.math.unsorted_segment_sum(
+            fm * tf.expand_dims(tf.cast(et_exp, dtype=fm.dtype), axis=1), ind, num_segments)  # (batch, feat)
+        rt = tf.cast(rt, dtype=fq.dtype)
+        # Since the maximum contributes exp(0)=1, norm >= 1 for non-empty samples and 0 only for empty samples,
+        # where also rt=0. Clipping at one therefore replaces a nan-guarded reciprocal.
+        return rt / tf.expand_dims(tf.maximum(norm, tf.ones_like(norm)), axis=1)
+
     @staticmethod
     def get_scale_per_batch(x):
         """Get re-scaling for the batch."""
         return tf.keras.backend.max(x, axis=0, keepdims=True)
 
-    @staticmethod
-    def get_scale_per_sample(x, ind, rep):
-        """Get re-scaling for the sample."""
-        out = tf.math.segment_max(x, ind)  # (batch,)
-        out = tf.repeat(out, rep)  # (batch*num,)
-        return out
-
-    @staticmethod
-    def get_norm(x, ind, rep):
-        """Compute Norm."""
-        norm = tf.math.segment_sum(x, ind)  # (batch,)
-        norm = tf.math.reciprocal_no_nan(norm)  # (batch,)
-        norm = tf.repeat(norm, rep, axis=0)  # (batch*num,)
-        return norm
-
-    def init_qstar_0(self, m, batch_index, batch_num):
+    def init_qstar_0(self, m, batch_index, batch_num, num_segments):
         """Initialize the q0 with zeros."""
-        batch_shape = ksb.shape(batch_num)
-        return tf.zeros((batch_shape[0], 1, 2 * self.channels))
+        return tf.zeros((num_segments, 2 * self.channels), dtype=self.dtype)
 
-    def init_qstar_mean(self, m, batch_index, batch_num):
+    def init_qstar_mean(self, m, batch_index, batch_num, num_segments):
         """Initialize the q0 with mean."""
-        # use q0=avg(m) (or q0=0)
-        # batch_shape = ksb.shape(batch_num)
-        q = tf.math.segment_mean(m, batch_index)  # (batch,feat)
+        # use q0=avg(m) (or q0=0), reusing the row lengths of the input instead of counting segments again.
+        q = tf.math.unsorted_segment_sum(m, batch_index, num_segments)  # (batch,feat)
+        q = tf.math.divide_no_nan(q, tf.cast(tf.expand_dims(batch_num, axis=1), dtype=q.dtype))  # (batch,feat)
+        q = tf.cast(q, dtype=self.dtype)
         # r0
-        qt = tf.repeat(q, batch_num, axis=0)  # (batch*num,feat)
-        et = self.f_et(m, qt)  # (batch*num,)
-        # get at = exp(et)/sum(et) with sum(et)=norm
-        at = ksb.exp(et - self.get_scale_per_sample(et, batch_index, batch_num))  # (batch*num,)
-        norm = self.get_norm(at, batch_index, batch_num)  # (batch*num,)
-        at = norm * at  # (batch*num,) x (batch*num,)
-        # calculate rt
-        at = ksb.expand_dims(at, axis=1)  # (batch*num,1)
-        rt = m * at  # (batch*num,feat) x (batch*num,1)
-        rt = tf.math.segment_sum(rt, batch_index)  # (batch,feat)
-        # [q0,r0]
-        qstar = ksb.concatenate([q, rt], axis=1)  # (batch,2*feat)
-        qstar = ksb.expand_dims(qstar, axis=1)  # (batch,1,2*feat)
-        return qstar
+        rt = self.f_rt(m, q, batch_index, num_segments)  # (batch,feat)
+        # [q0,r0] as (batch,2*feat)
+        return tf.concat([q, rt], axis=1)
 
     def get_config(self):
         """Make config for layer."""
         config = super(PoolingSet2Set, self).get_config()
         config.update({"channels": self.channels, "T": self.T, "pooling_method": self.pooling_method,
-                       "init_qstar": self.init_qstar})
+                       "init_qstar": self.init_qstar, "unroll_iterations": self.unroll_iterations})
         lstm_conf = self.lay_lstm.get_config()
         lstm_param = ["activation",
                       "recurrent_activation",
@@ -3,7 +3,7 @@ import tensorflow.keras as ks
 
 from kgcnn.layers.base import GraphBaseLayer
 from kgcnn.ops.partition import partition_row_indexing
-from kgcnn.ops.segment import segment_ops_by_name, segment_softmax
+from kgcnn.ops.segment import segment_ops_by_name, segment_softmax, unsorted_segment_softmax
 
 
 @tf.keras.utils.register_keras_serializable(package='kgcnn', name='PoolingLocalEdges')
@@ -580,12 +580,13 @@ class PoolingEmbeddingAttention(GraphBaseLayer):
         # Need ragged input but can be generalized in the future.
         self.assert_ragged_input_rank(inputs)
         # We cast to values here
-        nod, batchi, target_len = inputs[0].values, inputs[0].value_rowids(), inputs[0].row_lengths()
+        nod, batchi = inputs[0].values, inputs[0].value_rowids()
+        num_segments = inputs[0].nrows(out_type=batchi.dtype)
         ats = inputs[1].values
 
-        ats = segment_softmax(ats, batchi)
+        ats = unsorted_segment_softmax(ats, batchi, num_segments)
         get = nod * ats
-        out = tf.math.segment_sum(get, batchi)
+        out = tf.math.unsorted_segment_sum(get, batchi, num_segments)
 
         return out
 
@@ -5,10 +5,13 @@ from kgcnn.layers.geom import DisplacementVectorsASU, DisplacementVectorsUnitCel
 from kgcnn.layers.pooling import PoolingNodes, PoolingWeightedNodes
 from kgcnn.layers.modules import OptionalInputEmbedding, LazySubtract
 from kgcnn.layers.mlp import MLP
-from kgcnn.utils.models import update_model_kwargs
+from kgcnn.utils.models import update_model_kwargs, cast_output_to_variable_dtype
 
 ks = tf.keras
 
+# Model output is kept in float32 for mixed precision policies via `cast_output_to_variable_dtype`.
+supports_mixed_precision = True
+
 model_crystal_default = {
     'name': 'CGCNN',
     'inputs': [
@@ -107,6 +110,8 @@ def make_crystal_model(inputs: list = None,
     if output_embedding != "graph":
         raise ValueError("Unsupported output embedding for mode `CGCNN`.")
 
+    out = cast_output_to_variable_dtype(out)
+
     if make_distances:
         if representation == 'unit':
             model = ks.models.Model(
@@ -1,7 +1,7 @@
 import tensorflow as tf
 from kgcnn.layers.casting import ChangeTensorType
 from kgcnn.layers.conv.gin_conv import GIN, GINE
-from kgcnn.layers.modules import DenseEmbedding, OptionalInputEmbedding
+from kgcnn.layers.modules import DenseEmbedding, OptionalInputEmbedding, LazyConcatenate
 from kgcnn.layers.mlp import GraphMLP, MLP
 from kgcnn.layers.pooling import PoolingNodes
 from kgcnn.utils.models import update_model_kwargs
@@ -96,7 +96,10 @@ def make_model(inputs: list = None,
 
     # Output embedding choice
     if output_embedding == "graph":
-        out = [PoolingNodes()(x) for x in list_embeddings]  # will return tensor
+        # Pool all depth embeddings in a single pass, they share the same number of units.
+        out = LazyConcatenate(axis=-1)(list_embeddings)
+        out = PoolingNodes()(out)  # will return tensor
+        out = tf.split(out, len(list_embeddings), axis=-1)
         out = [MLP(**last_mlp)(x) for x in out]
         out = [ks.layers.Dropout(dropout)(x) for x in out]
         out = ks.layers.Add()(out)
@@ -205,7 +208,10 @@ def make_model_edge(inputs: list = None,
 
     # Output embedding choice
     if output_embedding == "graph":
-        out = [PoolingNodes()(x) for x in list_embeddings]  # will return tensor
+        # Pool all depth embeddings in a single pass, they share the same number of units.
+        out = LazyConcatenate(axis=-1)(list_embeddings)
+        out = PoolingNodes()(out)  # will return tensor
+        out = tf.split(out, len(list_embeddings), axis=-1)
         out = [MLP(**last_mlp)(x) for x in out]
         out = [ks.layers.Dropout(dropout)(x) for x in out]
         out = ks.layers.Add()(out)
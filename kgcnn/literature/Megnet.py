@@ -5,11 +5,14 @@ from kgcnn.layers.modules import DenseEmbedding, LazyAdd, DropoutEmbedding, Opti
 from kgcnn.layers.mlp import GraphMLP, MLP
 from kgcnn.layers.pooling import PoolingGlobalEdges, PoolingNodes
 from kgcnn.layers.pool.set2set import PoolingSet2Set
-from kgcnn.utils.models import update_model_kwargs
+from kgcnn.utils.models import update_model_kwargs, cast_output_to_variable_dtype
 
 # from kgcnn.layers.casting import ChangeTensorType, ChangeIndexing
 ks = tf.keras
 
+# Model output is kept in float32 for mixed precision policies via `cast_output_to_variable_dtype`.
+supports_mixed_precision = True
+
 # Implementation of Megnet in `tf.keras` from paper:
 # Graph Networks as a Universal Machine Learning Framework for Molecules and Crystals
 # by Chi Chen, Weike Ye, Yunxing Zuo, Chen Zheng, and Shyue Ping Ong*
@@ -181,6 +184,7 @@ def make_model(inputs: list = None,
         raise ValueError("Unsupported output embedding for mode `Megnet`.")
 
     main_output = MLP(**output_mlp)(final_vec)
+    main_output = cast_output_to_variable_dtype(main_output)
     model = ks.models.Model(inputs=[node_input, xyz_input, edge_index_input, env_input], outputs=main_output)
     return model
 
@@ -359,6 +363,7 @@ def make_crystal_model(inputs: list = None,
         raise ValueError("Unsupported output embedding for mode `Megnet`.")
 
     main_output = MLP(**output_mlp)(final_vec)
+    main_output = cast_output_to_variable_dtype(main_output)
     model = ks.models.Model(inputs=[node_input, xyz_input, edge_index_input, env_input, edge_image, lattice],
                             outputs=main_output)
     return model
@@ -1,14 +1,18 @@
 import tensorflow as tf
 from kgcnn.layers.casting import ChangeTensorType
 from kgcnn.layers.conv.schnet_conv import SchNetInteraction
-from kgcnn.layers.geom import NodeDistanceEuclidean, GaussBasisLayer, NodePosition, ShiftPeriodicLattice
+from kgcnn.layers.geom import NodeDistanceEuclidean, GaussBasisLayer, NodePosition, ShiftPeriodicLattice, \
+    EdgeDistanceEuclidean
 from kgcnn.layers.modules import DenseEmbedding, OptionalInputEmbedding
 from kgcnn.layers.mlp import GraphMLP, MLP
 from kgcnn.layers.pooling import PoolingNodes
-from kgcnn.utils.models import update_model_kwargs
+from kgcnn.utils.models import update_model_kwargs, cast_output_to_variable_dtype
 
 ks = tf.keras
 
+# Model output is kept in float32 for mixed precision policies via `cast_output_to_variable_dtype`.
+supports_mixed_precision = True
+
 # Implementation of Schnet in `tf.keras` from paper:
 # by Kristof T. Schütt, Pieter-Jan Kindermans, Huziel E. Sauceda, Stefan Chmiela,
 # Alexandre Tkatchenko, Klaus-Robert Müller (2018)
@@ -108,8 +112,7 @@ def make_model(inputs: list = None,
 
     if make_distance:
         x = xyz_input
-        pos1, pos2 = NodePosition()([x, edi])
-        ed = NodeDistanceEuclidean()([pos1, pos2])
+        ed = EdgeDistanceEuclidean()([x, edi])
     else:
         ed = xyz_input
 
@@ -137,6 +140,8 @@ def make_model(inputs: list = None,
     else:
         raise ValueError("Unsupported output embedding for mode `SchNet`")
 
+    out = cast_output_to_variable_dtype(out)
+
     model = ks.models.Model(inputs=[node_input, xyz_input, edge_index_input], outputs=out)
     return model
 
@@ -269,5 +274,7 @@ def make_crystal_model(inputs: list = None,
     else:
         raise ValueError("Unsupported output embedding for mode `SchNet`")
 
+    out = cast_output_to_variable_dtype(out)
+
     model = ks.models.Model(inputs=[node_input, xyz_input, edge_index_input, edge_image, lattice], outputs=out)
     return model
@@ -24,6 +24,30 @@ def segment_softmax(data, segment_ids, normalize: bool = True):
     return data_exp / data_exp_sum
 
 
+@tf.function
+def unsorted_segment_softmax(data, segment_ids, num_segments, normalize: bool = True):
+    """Segment softmax similar to segment_softmax but for unsorted segment IDs.
+
+    Args:
+        data (tf.Tensor): Data tensor with segments in arbitrary order.
+        segment_ids (tf.Tensor): IDs of the segments.
+        num_segments (tf.Tensor): Number of segments, i.e. at least `max(segment_ids) + 1`.
+        normalize (bool): Normalize data for softmax. Default is True.
+
+    Returns:
+        tf.Tensor: reduced segment data with a softmax function.
+    """
+    if normalize:
+        data_segment_max = tf.math.unsorted_segment_max(data, segment_ids, num_segments)
+        data_max = tf.gather(data_segment_max, segment_ids)
+        data = data - data_max
+
+    data_exp = tf.math.exp(data)
+    data_exp_segment_sum = tf.math.unsorted_segment_sum(data_exp, segment_ids, num_segments)
+    data_exp_sum = tf.gather(data_exp_segment_sum, segment_ids)
+    return data_exp / data_exp_sum
+
+
 @tf.function
 def segment_ops_by_name(segment_name: str, data, segment_ids):
     """Segment operation chosen by string identifier.
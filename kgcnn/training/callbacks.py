@@ -4,8 +4,9 @@ import tensorflow as tf
 
 @tf.keras.utils.register_keras_serializable(package='kgcnn', name='LearningRateLoggingCallback')
 class LearningRateLoggingCallback(tf.keras.callbacks.Callback):
-    """Callback logging the learning rate. This does not work universally yet.
-    Will be improved in the future."""
+    """Callback logging the learning rate once per epoch.
+    Use this callback instead of adding the learning rate as a metric to `compile`, which would read out the
+    learning rate on every batch. Also works for optimizers with a :obj:`LearningRateSchedule`."""
 
     def __init__(self, verbose: int = 0):
         super(LearningRateLoggingCallback, self).__init__()
@@ -21,10 +22,14 @@ class LearningRateLoggingCallback(tf.keras.callbacks.Callback):
         Returns:
             None.
         """
-        lr = self.model.optimizer.lr
+        optimizer = self.model.optimizer
+        lr = optimizer.learning_rate
+        if isinstance(lr, tf.keras.optimizers.schedules.LearningRateSchedule):
+            lr = lr(optimizer.iterations)
+        lr = float(tf.keras.backend.get_value(lr))
         tf.summary.scalar('learning rate', data=lr, step=epoch)
         logs = logs or {}
-        logs['lr'] = tf.keras.backend.get_value(self.model.optimizer.lr)
+        logs['lr'] = lr
         if self.verbose > 0:
             print('\nEpoch %05d: LearningRateScheduler reducing learning '
                   'rate to %s.' % (epoch + 1, lr))
@@ -39,6 +39,24 @@ def get_model_class(module_name: str, class_name: str):
     return make_model
 
 
+def cast_output_to_variable_dtype(out):
+    r"""Cast a model output to the variable dtype of the global keras mixed precision policy.
+
+    For mixed precision policies like 'mixed_float16', the output of the model is then kept in float32 for a
+    numerically stable loss and metrics. For policies without mixed precision, the output is returned unchanged.
+
+    Args:
+        out (tf.Tensor): Output tensor of the model.
+
+    Returns:
+        tf.Tensor: Output tensor in variable dtype of the global policy.
+    """
+    policy = ks.mixed_precision.global_policy()
+    if policy.compute_dtype != policy.variable_dtype:
+        out = ks.layers.Activation("linear", dtype=policy.variable_dtype)(out)
+    return out
+
+
 def generate_embedding(inputs, input_shape: list, embedding_args: dict, embedding_rank: int = 1, **kwargs):
     """Deprecated. Optional embedding for tensor input.
     If there is no feature dimension, an embedding layer can be used.
@@ -111,11 +111,11 @@ def plot_predict_true(y_predict, y_true, data_unit: list = None, model_name: str
     if len(target_names) != num_targets:
         print("WARNING:kgcnn: Targets do not match names for plot.")
 
+    mae_valid = np.mean(np.abs(y_true - y_predict), axis=0)  # For all targets in one pass.
     fig = plt.figure()
     for i in range(num_targets):
-        mae_valid = np.mean(np.abs(y_true[:, i] - y_predict[:, i]))
         plt.scatter(y_predict[:, i], y_true[:, i], alpha=0.3,
-                    label=target_names[i] + " MAE: {0:0.4f} ".format(mae_valid) + "[" + data_unit[i] + "]")
+                    label=target_names[i] + " MAE: {0:0.4f} ".format(mae_valid[i]) + "[" + data_unit[i] + "]")
     plt.plot(np.arange(np.amin(y_true), np.amax(y_true), 0.05),
              np.arange(np.amin(y_true), np.amax(y_true), 0.05), color='red')
     plt.xlabel('Predicted')
@@ -3,10 +3,12 @@ import numpy as np
 
 import tensorflow as tf
 from kgcnn.graph.adj import get_angle_indices
-from kgcnn.layers.geom import NodeDistanceEuclidean, EdgeAngle, NodePosition
+from kgcnn.layers.geom import NodeDistanceEuclidean, EdgeAngle, NodePosition, EdgeDistanceEuclidean
 from kgcnn.layers.conv.dimenet_conv import SphericalBasisLayer
 from kgcnn.layers.geom import BesselBasisLayer
 from kgcnn.layers.modules import LazySubtract
+from kgcnn.graph.geom import range_neighbour_lattice, make_rotation_matrix, rotate_to_principle_axis, \
+    rigid_transform, coulomb_matrix_to_inverse_distance_proton
 
 
 class TestSphericalBasisLayer(unittest.TestCase):
@@ -127,5 +129,210 @@ class TestBesselBasisLayer(unittest.TestCase):
         self.assertTrue(np.max(np.abs(test1 - bessel[1])) < 1e-5)
 
 
+class TestEdgeDistanceEuclidean(unittest.TestCase):
+
+    x = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.5, 2.0, -1.0], [0.1, 0.2, 0.3], [-1.0, 1.5, 0.2],
+                  [2.0, 2.0, 2.0], [0.3, -0.7, 1.1]], dtype="float32")
+    ei = np.array([[0, 1], [1, 2], [2, 0], [2, 2], [0, 3], [3, 1], [2, 0], [1, 2]])
+
+    def _inputs(self, index_dtype):
+        rag_x = tf.RaggedTensor.from_row_lengths(self.x, np.array([3, 4]))
+        rag_ei = tf.RaggedTensor.from_row_lengths(self.ei.astype(index_dtype), np.array([4, 4]))
+        return rag_x, rag_ei
+
+    def _assert_matches_node_distance(self, rag_x, rag_ei, selection_index=None, atol=1e-6):
+        result = EdgeDistanceEuclidean(selection_index=selection_index)([rag_x, rag_ei])
+        reference = NodeDistanceEuclidean()(NodePosition(selection_index=selection_index)([rag_x, rag_ei]))
+        self.assertEqual(result.dtype, reference.dtype)
+        self.assertTrue(np.array_equal(result.row_lengths().numpy(), reference.row_lengths().numpy()))
+        self.assertEqual(result.values.shape[-1], 1)
+        self.assertTrue(np.allclose(np.array(result.values, dtype="float32"),
+                                    np.array(reference.values, dtype="float32"), atol=atol))
+
+    def test_matches_node_distance(self):
+        for index_dtype in ["int64", "int32"]:
+            rag_x, rag_ei = self._inputs(index_dtype)
+            self._assert_matches_node_distance(rag_x, rag_ei)
+            self._assert_matches_node_distance(rag_x, rag_ei, selection_index=[1, 0])
+
+    def test_mixed_precision(self):
+        try:
+            for policy in ["mixed_float16", "mixed_bfloat16"]:
+                tf.keras.mixed_precision.set_global_policy(policy)
+                rag_x, rag_ei = self._inputs("int32")
+                self._assert_matches_node_distance(rag_x, rag_ei, atol=1e-2)
+        finally:
+            tf.keras.mixed_precision.set_global_policy("float32")
+
+
+def _range_neighbour_lattice_dense(coordinates, lattice, max_distance=4.0, self_loops=False, sort_distance=True):
+    # Reference with the dense Nx(N*C+1) distance matrix of the original implementation.
+    def mesh_grid_list(bound_left, bound_right):
+        pos = [np.arange(i, j + 1, 1) for i, j in zip(bound_left, bound_right)]
+        return np.array(np.meshgrid(*pos)).T.reshape(-1, 3)
+
+    center_unit_cell = np.sum(lattice, axis=0, keepdims=True) / 2
+    max_radius_cell = np.amax(np.sqrt(np.sum(np.square(lattice - center_unit_cell), axis=-1)))
+    bounding_box_index = np.sum(np.abs(np.linalg.inv(np.transpose(lattice))), axis=1) * (
+            max_distance + max_radius_cell)
+    bounding_box_index = np.ceil(bounding_box_index).astype("int")
+    bounding_grid = mesh_grid_list(-bounding_box_index, bounding_box_index)
+    bounding_grid = bounding_grid[np.logical_not(np.all(bounding_grid == np.array([[0, 0, 0]]), axis=-1))]
+    bounding_grid_real = np.dot(bounding_grid, lattice)
+    mask_centers = np.sqrt(np.sum(np.square(bounding_grid_real), axis=-1)) <= max_distance + max_radius_cell
+    images, shifts = bounding_grid[mask_centers], bounding_grid_real[mask_centers]
+
+    num_nodes, num_images = len(coordinates), len(images)
+    node_index = np.arange(num_nodes)
+    coord_images = np.reshape(np.expand_dims(coordinates, axis=1) + shifts, (-1, 3))
+    center_indices = np.stack(np.meshgrid(node_index, node_index, indexing="ij"), axis=-1)
+    center_dist = np.expand_dims(coordinates, axis=0) - np.expand_dims(coordinates, axis=1)
+    center_image = np.zeros(center_dist.shape)
+    if not self_loops:
+        m = np.logical_not(np.eye(num_nodes, dtype="bool"))
+        center_indices = np.reshape(center_indices[m], (num_nodes, num_nodes - 1, 2))
+        center_image = np.reshape(center_image[m], (num_nodes, num_nodes - 1, 3))
+        center_dist = np.reshape(center_dist[m], (num_nodes, num_nodes - 1, 3))
+    dist = np.expand_dims(coord_images, axis=0) - np.expand_dims(coordinates, axis=1)
+    dist_indices = np.stack([np.repeat(node_index[:, None], num_nodes * num_images, axis=1),
+                             np.repeat(np.repeat(node_index, num_images)[None, :], num_nodes, axis=0)], axis=-1)
+    dist_images = np.repeat(np.expand_dims(np.tile(images, (num_nodes, 1)), axis=0), num_nodes, axis=0)
+    dist_indices = np.concatenate([center_indices, dist_indices], axis=1)
+    dist_images = np.concatenate([center_image, dist_images], axis=1)
+    dist = np.sqrt(np.sum(np.square(np.concatenate([center_dist, dist], axis=1)), axis=-1))
+    if sort_distance:
+        arg_sort = np.argsort(dist, axis=-1, kind="stable")
+        dist = np.take_along_axis(dist, arg_sort, axis=1)
+        dist_indices = np.take_along_axis(dist_indices, arg_sort[..., None], axis=1)
+        dist_images = np.take_along_axis(dist_images, arg_sort[..., None], axis=1)
+    mask = dist <= max_distance
+    return [dist_indices[mask], dist_images[mask], dist[mask]]
+
+
+class TestRangeNeighbourLattice(unittest.TestCase):
+
+    lattice = np.array([[3.1, 0.0, 0.0], [0.9, 2.7, 0.0], [0.4, -0.6, 3.4]])
+
+    def _coordinates(self):
+        rng = np.random.default_rng(1)
+        return np.dot(rng.uniform(size=(5, 3)), self.lattice)
+
+    @staticmethod
+    def _canonical(indices, images, dist):
+        # Order of pairs with (almost) equal distance is not unique.
+        order = np.lexsort(tuple(images.T[::-1]) + (indices[:, 1], indices[:, 0]))
+        return indices[order], images[order], dist[order]
+
+    def _assert_equal_neighbours(self, result, reference, same_order):
+        self.assertEqual(len(result[0]), len(reference[0]))
+        if not same_order:
+            result, reference = self._canonical(*result), self._canonical(*reference)
+        self.assertTrue(np.array_equal(result[0], reference[0]))
+        self.assertTrue(np.array_equal(result[1], reference[1]))
+        self.assertTrue(np.allclose(result[2], reference[2], atol=1e-5))
+
+    def test_unsorted_matches_dense(self):
+        coord = self._coordinates()
+        for self_loops in [False, True]:
+            result = range_neighbour_lattice(coord, self.lattice, 4.0, self_loops=self_loops, sort_distance=False)
+            reference = _range_neighbour_lattice_dense(coord, self.lattice, 4.0, self_loops, sort_distance=False)
+            self._assert_equal_neighbours(result, reference, same_order=True)
+
+    def test_sorted_matches_dense(self):
+        coord = self._coordinates()
+        for self_loops in [False, True]:
+            result = range_neighbour_lattice(coord, self.lattice, 4.0, self_loops=self_loops, sort_distance=True)
+            reference = _range_neighbour_lattice_dense(coord, self.lattice, 4.0, self_loops, sort_distance=True)
+            self._assert_equal_neighbours(result, reference, same_order=False)
+            # Sorted by central node and then by distance.
+            indices, _, dist = result
+            self.assertTrue(np.all(np.diff(indices[:, 0]) >= 0))
+            same_node = np.diff(indices[:, 0]) == 0
+            self.assertTrue(np.all(np.diff(dist)[same_node] >= 0))
+
+    def test_duplicate_points(self):
+        coord = np.array([[0.5, 0.5, 0.5], [0.5, 0.5, 0.5], [1.5, 1.0, 0.5]])
+        lattice = np.eye(3) * 2.0
+        for self_loops in [False, True]:
+            result = range_neighbour_lattice(coord, lattice, 2.5, self_loops=self_loops, sort_distance=False)
+            reference = _range_neighbour_lattice_dense(coord, lattice, 2.5, self_loops, sort_distance=False)
+            self._assert_equal_neighbours(result, reference, same_order=True)
+            zero_dist = result[0][result[2] == 0]
+            # Duplicate nodes are always connected with zero distance, the node itself only with self-loops.
+            self.assertTrue([0, 1] in zero_dist.tolist() and [1, 0] in zero_dist.tolist())
+            self.assertEqual([0, 0] in zero_dist.tolist(), self_loops)
+
+    def test_dtypes(self):
+        indices, images, dist = range_neighbour_lattice(self._coordinates(), self.lattice, 4.0)
+        self.assertTrue(np.issubdtype(indices.dtype, np.integer))
+        self.assertEqual(indices.shape[1], 2)
+        self.assertEqual(images.dtype, np.float32)
+        self.assertEqual(images.shape[1], 3)
+        self.assertEqual(dist.dtype, np.float32)
+
+
+class TestGeometryHelpers(unittest.TestCase):
+
+    def test_rotation_matrix(self):
+        def rotation_matrix_reference(vector, angle):
+            angle = angle / 180.0 * np.pi
+            d = vector / np.linalg.norm(vector)
+            c, s = np.cos(angle), np.sin(angle)
+            return np.array([
+                [d[0] ** 2 * (1 - c) + c, d[0] * d[1] * (1 - c) - d[2] * s, d[0] * d[2] * (1 - c) + d[1] * s],
+                [d[0] * d[1] * (1 - c) + d[2] * s, d[1] ** 2 * (1 - c) + c, d[1] * d[2] * (1 - c) - d[0] * s],
+                [d[0] * d[2] * (1 - c) - d[1] * s, d[1] * d[2] * (1 - c) + d[0] * s, d[2] ** 2 * (1 - c) + c]])
+
+        rng = np.random.default_rng(2)
+        vectors, angles = rng.normal(size=(4, 3)), rng.uniform(-180, 180, size=4)
+        reference = np.stack([rotation_matrix_reference(v, a) for v, a in zip(vectors, angles)])
+        self.assertTrue(np.allclose(make_rotation_matrix(vectors[0], angles[0]), reference[0]))
+        self.assertTrue(np.allclose(make_rotation_matrix(vectors, angles), reference))
+
+    def test_rotate_to_principle_axis(self):
+        rng = np.random.default_rng(3)
+        coord = rng.normal(size=(10, 3)) * np.array([[3.0, 2.0, 1.0]])
+        centroid = np.mean(coord, axis=0)
+        _, _, vh_ref = np.linalg.svd(np.dot((coord - centroid).T, coord - centroid))
+        vh, rotated = rotate_to_principle_axis(coord)
+        # Principle axis are only unique up to their sign.
+        signs = np.sign(np.sum(vh * vh_ref, axis=-1, keepdims=True))
+        self.assertTrue(np.allclose(vh * signs, vh_ref))
+        self.assertTrue(np.allclose((rotated - centroid) * signs.T, np.dot(coord - centroid, vh_ref.T)))
+        # Batch of point-clouds.
+        vh_b, rotated_b = rotate_to_principle_axis(np.stack([coord, coord]))
+        self.assertTrue(np.allclose(np.abs(vh_b[1]), np.abs(vh)))
+        self.assertTrue(np.allclose(np.abs(rotated_b[1] - centroid), np.abs(rotated - centroid)))
+
+    def test_rigid_transform(self):
+        rng = np.random.default_rng(4)
+        a = rng.normal(size=(3, 6, 3))
+        rot = make_rotation_matrix(rng.normal(size=(3, 3)), rng.uniform(-180, 180, size=3))
+        b = np.matmul(a, np.swapaxes(rot, -1, -2)) + rng.normal(size=(3, 1, 3))
+        b_single, r_single, t_single = rigid_transform(a[0], b[0])
+        self.assertTrue(np.allclose(b_single, b[0]))
+        self.assertTrue(np.allclose(r_single, rot[0]))
+        self.assertEqual(t_single.shape, (3, 1))
+        self.assertTrue(np.allclose(np.dot(r_single, a[0].T) + t_single, b[0].T))
+        b_batch, r_batch, t_batch = rigid_transform(a, b)
+        self.assertTrue(np.allclose(b_batch, b))
+        self.assertTrue(np.allclose(r_batch, rot))
+        self.assertTrue(np.allclose(t_batch[0], t_single))
+
+    def test_coulomb_matrix_diagonal(self):
+        rng = np.random.default_rng(5)
+        z = rng.integers(1, 10, size=(2, 4)).astype("float")
+        inv_dist = rng.uniform(0.2, 1.0, size=(2, 4, 4))
+        inv_dist = (inv_dist + np.swapaxes(inv_dist, -1, -2)) / 2
+        coulomb = np.expand_dims(z, axis=-1) * np.expand_dims(z, axis=-2) * inv_dist
+        index = np.arange(4)
+        coulomb[:, index, index] = 0.5 * np.power(z, 2.4)
+        inv_dist[:, index, index] = 0.0
+        c, z_out = coulomb_matrix_to_inverse_distance_proton(coulomb)
+        self.assertTrue(np.allclose(c, inv_dist))
+        self.assertTrue(np.array_equal(z_out, z))
+        self.assertEqual(z_out.dtype, np.int32)
+
+
 if __name__ == '__main__':
     unittest.main()
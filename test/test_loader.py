@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+from kgcnn.io.loader import tf_dataset_from_tensors
+
+
+class TestDatasetFromTensors(unittest.TestCase):
+
+    nodes = [[[0.0], [1.0]], [[2.0]], [[3.0], [4.0], [5.0]], [[6.0]], [[7.0], [8.0]]]
+    labels = np.array([[0.0], [1.0], [2.0], [3.0], [4.0]])
+
+    def _make_inputs(self):
+        x = tf.ragged.constant(self.nodes, ragged_rank=1, inner_shape=(1,))
+        g = tf.constant(np.arange(5, dtype="float32")[:, None])
+        return [x, g]
+
+    def test_ragged_and_plain_inputs(self):
+        x = self._make_inputs()
+        batches = list(tf_dataset_from_tensors(x, self.labels, batch_size=2))
+        self.assertEqual(len(batches), 3)
+        (x_b, g_b), y_b = batches[0]
+        self.assertTrue(isinstance(x_b, tf.RaggedTensor))
+        self.assertEqual(x_b.to_list(), self.nodes[:2])
+        self.assertTrue(np.allclose(g_b.numpy(), [[0.0], [1.0]]))
+        self.assertTrue(np.allclose(y_b.numpy(), self.labels[:2]))
+
+    def test_final_partial_batch(self):
+        x = self._make_inputs()
+        batches = list(tf_dataset_from_tensors(x, self.labels, batch_size=2))
+        (x_b, g_b), y_b = batches[-1]
+        self.assertEqual(x_b.to_list(), self.nodes[4:])
+        self.assertEqual(g_b.shape[0], 1)
+        self.assertEqual(y_b.shape[0], 1)
+
+    def test_no_labels(self):
+        x = self._make_inputs()
+        ds = tf_dataset_from_tensors(x, batch_size=5)
+        batches = list(ds)
+        self.assertEqual(len(batches), 1)
+        # Inputs alone are nested in a tuple, so that keras does not unpack them as (x, y).
+        self.assertEqual(len(batches[0]), 1)
+        x_b, g_b = batches[0][0]
+        self.assertEqual(x_b.to_list(), self.nodes)
+
+    def test_indices_order(self):
+        x = self._make_inputs()
+        indices = np.array([3, 0, 4])
+        ds = tf_dataset_from_tensors(x, self.labels, batch_size=2, indices=indices)
+        y = np.concatenate([y_b.numpy() for _, y_b in ds])
+        nodes = sum([x_b.to_list() for (x_b, _), _ in ds], [])
+        self.assertTrue(np.allclose(y, self.labels[indices]))
+        self.assertEqual(nodes, [self.nodes[i] for i in indices])
+
+    def test_shuffle_seed(self):
+        x = self._make_inputs()
+
+        def draw(seed):
+            ds = tf_dataset_from_tensors(x, self.labels, batch_size=2, shuffle=True, seed=seed)
+            return np.concatenate([y_b.numpy() for _, y_b in ds])[:, 0]
+
+        y1, y2 = draw(1), draw(1)
+        self.assertTrue(np.array_equal(y1, y2))
+        self.assertTrue(np.array_equal(np.sort(y1), self.labels[:, 0]))
+        # Inputs and labels must be drawn with the same indices.
+        ds = tf_dataset_from_tensors(x, self.labels, batch_size=2, shuffle=True, seed=1)
+        for (_, g_b), y_b in ds:
+            self.assertTrue(np.allclose(g_b.numpy(), y_b.numpy()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+from kgcnn.layers.pool.set2set import PoolingSet2Set
+
+
+class TestPoolingSet2Set(unittest.TestCase):
+
+    x = np.linspace(-1.0, 1.0, 20, dtype="float32").reshape(5, 4)
+    row_lengths = [2, 3]
+
+    @staticmethod
+    def _make_model():
+        inp = tf.keras.layers.Input(shape=(None, 4), ragged=True)
+        out = PoolingSet2Set(channels=4, T=3, pooling_method="sum", init_qstar="mean", name="set2set")(inp)
+        return tf.keras.models.Model(inputs=inp, outputs=out)
+
+    def test_load_checkpoint(self):
+        # Checkpoint was saved by `model.save_weights` with PoolingSet2Set of kgcnn==2.0.4, which tracks the weights
+        # of the LSTM as `lay_lstm.cell`.
+        model = self._make_model()
+        status = model.load_weights("set2set_reference/set2set")
+        status.assert_existing_objects_matched()
+        x = tf.RaggedTensor.from_row_lengths(self.x, self.row_lengths)
+        reference = np.load("set2set_reference/set2set_output.npz")["output"]
+        self.assertTrue(np.max(np.abs(model.predict(x, verbose=0) - reference)) < 1e-6)
+
+    def test_save_load_weights(self):
+        model = self._make_model()
+        x = tf.RaggedTensor.from_row_lengths(self.x, self.row_lengths)
+        model_new = self._make_model()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            prefix = tf.train.Checkpoint(model=model).write(os.path.join(tmp_dir, "set2set"))
+            tf.train.Checkpoint(model=model_new).read(prefix).assert_existing_objects_matched()
+        self.assertTrue(np.max(np.abs(model.predict(x, verbose=0) - model_new.predict(x, verbose=0))) < 1e-6)
+
+    def test_unroll_iterations(self):
+        x = tf.RaggedTensor.from_row_lengths(self.x, self.row_lengths)
+        layer = PoolingSet2Set(channels=4, T=3, pooling_method="sum", init_qstar="mean")
+        out = layer(x).numpy()
+        layer_unrolled = PoolingSet2Set.from_config({**layer.get_config(), "unroll_iterations": True})
+        layer_unrolled.build(x.shape)
+        layer_unrolled.set_weights(layer.get_weights())
+        self.assertTrue(np.max(np.abs(out - layer_unrolled(x).numpy())) < 1e-6)
+        self.assertFalse(layer_unrolled.get_config()["unroll"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+from kgcnn.ops.segment import unsorted_segment_softmax
+
+
+class TestUnsortedSegmentSoftmax(unittest.TestCase):
+
+    data = np.array([[0.5, 1.0], [2.0, -1.0], [-0.3, 0.0], [1.2, 3.0], [0.0, 0.1], [-2.0, 0.4]], dtype="float32")
+    segment_ids = np.array([2, 0, 2, 3, 0, 2])
+
+    @staticmethod
+    def _softmax_reference(data, segment_ids):
+        out = np.zeros_like(data)
+        for i in np.unique(segment_ids):
+            x = data[segment_ids == i]
+            x = np.exp(x - np.amax(x, axis=0, keepdims=True))
+            out[segment_ids == i] = x / np.sum(x, axis=0, keepdims=True)
+        return out
+
+    def test_unsorted_segments(self):
+        # Segment 1 and 4 are empty.
+        out = unsorted_segment_softmax(self.data, self.segment_ids, num_segments=5).numpy()
+        self.assertTrue(np.allclose(out, self._softmax_reference(self.data, self.segment_ids), atol=1e-6))
+        segment_sum = tf.math.unsorted_segment_sum(out, self.segment_ids, num_segments=5).numpy()
+        self.assertTrue(np.allclose(segment_sum[[0, 2, 3]], 1.0, atol=1e-6))
+        self.assertTrue(np.allclose(segment_sum[[1, 4]], 0.0))
+
+    def test_large_logits(self):
+        data = self.data * 1000.0
+        out = unsorted_segment_softmax(data, self.segment_ids, num_segments=5).numpy()
+        self.assertTrue(np.all(np.isfinite(out)))
+        self.assertTrue(np.allclose(out, self._softmax_reference(data, self.segment_ids), atol=1e-6))
+        segment_sum = tf.math.unsorted_segment_sum(out, self.segment_ids, num_segments=5).numpy()
+        self.assertTrue(np.allclose(segment_sum[[0, 2, 3]], 1.0, atol=1e-6))
+
+
+if __name__ == '__main__':
+    unittest.main()
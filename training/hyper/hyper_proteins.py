@@ -6,7 +6,7 @@ hyper = {
             "config": {
                 "name": "GIN",
                 "inputs": [{"shape": [None, 3], "name": "node_labels", "dtype": "float32", "ragged": True},
-                           {"shape": [None, 2], "name": "edge_indices", "dtype": "int64", "ragged": True}],
+                           {"shape": [None, 2], "name": "edge_indices", "dtype": "int32", "ragged": True}],
                 "input_embedding": {"node": {"input_dim": 800, "output_dim": 64}},
                 "last_mlp": {"use_bias": [True], "units": [2],
                              "activation": ['linear']},
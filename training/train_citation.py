@@ -2,7 +2,6 @@ import numpy as np
 import argparse
 import os
 import time
-from tensorflow_addons import optimizers
 from datetime import timedelta
 import kgcnn.training.schedule
 import kgcnn.training.scheduler
@@ -72,9 +71,12 @@ y_train = np.array(labels)
 # Cross-validation via random KFold split form `sklearn.model_selection`.
 kf = KFold(**hyper["training"]["cross_validation"]["config"])
 
+# Make output directory. Indices of each split are written there as soon as the split is done.
+filepath = hyper.results_file_path()
+postfix_file = hyper["info"]["postfix_file"]
+
 # Iterate over the cross-validation splits.
-# Indices for train-test splits are stored in 'test_indices_list'.
-history_list, test_indices_list, model, hist = [], [], None, None
+history_list, model, hist = [], None, None
 for train_index, test_index in kf.split(X=np.arange(len(labels[0]))[:, None]):
 
     # Make the model for current split using model kwargs from hyperparameter.
@@ -93,7 +95,9 @@ for train_index, test_index in kf.split(X=np.arange(len(labels[0]))[:, None]):
     # Compile model with optimizer and loss from hyperparameter.
     # Since we use a sample weights for validation, the 'weighted_metrics' parameter has to be used for metrics.
     model.compile(**hyper.compile(weighted_metrics=None))
-    print(model.summary())
+    # The model is identical for each split, so the summary is only printed for the first split.
+    if hyper["training"]["fit"].get("verbose", 1) and len(history_list) == 0:
+        model.summary()
 
     # Run keras model-fit and take time for training.
     start = time.process_time()
@@ -107,11 +111,11 @@ for train_index, test_index in kf.split(X=np.arange(len(labels[0]))[:, None]):
 
     # Get loss from history
     history_list.append(hist)
-    test_indices_list.append([train_index, test_index])
 
-# Make output directory. This can further be changed in hyperparameter.
-filepath = hyper.results_file_path()
-postfix_file = hyper["info"]["postfix_file"]
+    # Save original data indices of the split.
+    np.savez_compressed(
+        os.path.join(filepath, model_name + "_kfold_splits" + postfix_file + "_%s.npz" % len(history_list)),
+        train=train_index, test=test_index)
 
 # Plot training- and test-loss vs epochs for all splits.
 plot_train_test_loss(history_list, loss_name=None, val_loss_name=None,
@@ -121,8 +125,5 @@ plot_train_test_loss(history_list, loss_name=None, val_loss_name=None,
 # Save keras-model to output-folder.
 model.save(os.path.join(filepath, "model"))
 
-# Save original data indices of the splits.
-np.savez(os.path.join(filepath, model_name + "_kfold_splits" + postfix_file + ".npz"), test_indices_list)
-
 # Save hyperparameter again, which were used for this fit.
 hyper.save(os.path.join(filepath, model_name + "_hyper" + postfix_file + ".json"))
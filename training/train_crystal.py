@@ -1,17 +1,19 @@
 import numpy as np
+import tensorflow as tf
 # import matplotlib as mpl
 # mpl.use('Agg')
 import time
 import os
+import sys
 import argparse
 from datetime import timedelta
-from tensorflow_addons import optimizers
 from kgcnn.scaler.scaler import StandardScaler
 import kgcnn.training.schedule
 import kgcnn.training.scheduler
 from kgcnn.metrics.metrics import ScaledMeanAbsoluteError, ScaledRootMeanSquaredError
 from sklearn.model_selection import KFold
 from kgcnn.hyper.hyper import HyperParameter
+from kgcnn.io.loader import tf_dataset_from_tensors
 from kgcnn.data.serial import deserialize as deserialize_dataset
 from kgcnn.utils.models import get_model_class
 from kgcnn.utils.plots import plot_train_test_loss, plot_predict_true
@@ -25,6 +27,12 @@ parser.add_argument("--hyper", required=False, help="Filepath to hyper-parameter
                     default="hyper/hyper_mp_e_form.py")
 parser.add_argument("--make", required=False, help="Name of the make function or class for model.",
                     default="make_crystal_model")
+parser.add_argument("--policy", required=False, default=None,
+                    help="Keras mixed precision policy, e.g. 'mixed_bfloat16', if supported by the model.")
+parser.add_argument("--mirrored", required=False, action="store_true",
+                    help="Train each split on all visible GPUs with a `tf.distribute.MirroredStrategy`.")
+parser.add_argument("--cache", required=False, action="store_true",
+                    help="Cache the processed dataset in its data directory and reuse it in the next run.")
 args = vars(parser.parse_args())
 print("Input of argparse:", args)
 
@@ -40,6 +48,13 @@ hyper = HyperParameter(hyper_path, model_name=model_name, model_class=make_funct
 # Model Selection to load a model definition from a module in kgcnn.literature
 make_model = get_model_class(model_name, make_function)
 
+# Mixed precision is only supported by models, which keep their output in float32 for loss and metrics and whose
+# layers run in reduced precision. This is marked by `supports_mixed_precision` in the module of the model.
+# Check before loading the dataset to not fail later in the middle of training.
+if args["policy"] not in [None, "float32"] and not getattr(
+        sys.modules[make_model.__module__], "supports_mixed_precision", False):
+    raise ValueError("Mixed precision policy '%s' is not supported for model '%s'." % (args["policy"], model_name))
+
 # Loading a specific per-defined dataset from a module in kgcnn.data.datasets.
 # Those sub-classed classes are named after the dataset like e.g. `MatProjectEFormDataset`
 # If no name is given, a general `CrystalDataset` is constructed.
@@ -48,7 +63,12 @@ make_model = get_model_class(model_name, make_function)
 # 'data_directory' etc.
 # Making a custom training script rather than configuring the dataset via hyperparameter can be
 # more convenient.
-dataset = deserialize_dataset(hyper["data"]["dataset"])
+# Optionally, the dataset after its 'methods' is cached to a pickled file and is reloaded from there in the next run.
+# The cache is keyed by the dataset serialization and the source files of the dataset.
+dataset_config = hyper["data"]["dataset"]
+if args["cache"]:
+    dataset_config = dict(dataset_config, cache=True)
+dataset = deserialize_dataset(dataset_config)
 
 # Check if dataset has the required properties for model input. This includes a quick shape comparison.
 # The name of the keras `Input` layer of the model is directly connected to property of the dataset.
@@ -61,7 +81,8 @@ dataset.clean(hyper["model"]["config"]["inputs"])
 data_length = len(dataset)  # Length of the cleaned dataset.
 
 # Train on graph, labels. Must be defined by subclasses of the dataset.
-labels = np.array(dataset.obtain_property("graph_labels"))
+# Labels are converted to float32 directly, which is the dtype of the model output and metrics.
+labels = np.asarray(dataset.obtain_property("graph_labels"), dtype="float32")
 label_names = dataset.label_names
 label_units = dataset.label_units
 if len(labels.shape) <= 1:
@@ -70,78 +91,112 @@ if len(labels.shape) <= 1:
 # Training on multiple targets for regression.
 multi_target_indices = hyper["training"]["multi_target_indices"]
 if multi_target_indices is not None:
-    labels = labels[:, multi_target_indices]
+    labels = np.take(labels, multi_target_indices, axis=-1)
     if label_names is not None:
         label_names = [label_names[i] for i in multi_target_indices]
     if label_units is not None:
         label_units = [label_units[i] for i in multi_target_indices]
 print("Labels %s in %s have shape %s" % (label_names, label_units, labels.shape))
 
+# Convert the dataset into tensorflow tensor representation only once. Which property of the dataset and whether the
+# tensor will be ragged is retrieved from the kwargs of the keras `Input` layers ('name' and 'ragged').
+# The graphs of each split are then drawn from these tensors by index.
+x_data = dataset.tensor(hyper["model"]["config"]["inputs"])
+
 # Cross-validation via random KFold split form `sklearn.model_selection`.
 kf = KFold(**hyper["training"]["cross_validation"]["config"])
 
+# Optionally train with mixed precision. Models keep their output in float32 for loss and metrics, and keras wraps
+# the optimizer for loss scaling for 'mixed_float16'. Must be set before the model is made.
+if args["policy"] is not None:
+    tf.keras.mixed_precision.set_global_policy(args["policy"])
+
+# Optionally distribute each training step over all visible GPUs. Model, metrics and optimizer must be created in the
+# scope of the strategy. The default strategy simply places the model on the default device.
+strategy = tf.distribute.MirroredStrategy() if args["mirrored"] else tf.distribute.get_strategy()
+
+# Make the model only once using model kwargs from hyperparameter. They are always updated on top of the models
+# default kwargs. The initial weights are restored for each split, instead of rebuilding the model.
+with strategy.scope():
+    model = make_model(**hyper["model"]["config"])
+model_initial_weights = model.get_weights()
+if hyper["training"]["fit"].get("verbose", 1):
+    model.summary()
+
+# If a scaler is used we add rescaled standard metrics to compile, since otherwise the keras history will not
+# directly log the original target values, but the scaled ones. The scale is set for each split.
+if "scaler" in hyper["training"]:
+    with strategy.scope():
+        metrics = [ScaledMeanAbsoluteError((1, 1), name="scaled_mean_absolute_error"),
+                   ScaledRootMeanSquaredError((1, 1), name="scaled_root_mean_squared_error")]
+else:
+    metrics = None
+
 # Training on splits. Since training on crystal datasets can be expensive, there is a 'execute_splits' parameter to not
 # train on all splits for testing.
 execute_splits = hyper["training"]["execute_folds"]
 splits_done = 0
-history_list, test_indices_list = [], []
-model, hist, x_test, y_test, scaler, atoms_test = None, None, None, None, None, None
+history_list = []
+hist, scaler = None, None
+
+# Make output directory. Indices of each split are written there as soon as the split is done.
+filepath = hyper.results_file_path()
+postfix_file = hyper["info"]["postfix_file"]
+
 for train_index, test_index in kf.split(X=np.arange(data_length)[:, None]):
 
     # Only do execute_splits out of the k-folds of cross-validation.
     if splits_done >= execute_splits:
         break
 
-    # Make the model for current split using model kwargs from hyperparameter.
-    # They are always updated on top of the models default kwargs.
-    model = make_model(**hyper["model"]["config"])
-
-    # First select training and test graphs from indices, then convert them into tensorflow tensor
-    # representation. Which property of the dataset and whether the tensor will be ragged is retrieved from the
-    # kwargs of the keras `Input` layers ('name' and 'ragged').
-    x_train, y_train = dataset[train_index].tensor(hyper["model"]["config"]["inputs"]), labels[train_index]
-    x_test, y_test = dataset[test_index].tensor(hyper["model"]["config"]["inputs"]), labels[test_index]
-    # Also keep the same information for atomic numbers of the molecules.
+    # Reset the model to its initial weights for the current split.
+    model.set_weights(model_initial_weights)
 
     # Normalize training and test targets via a sklearn `StandardScaler`. No other scaler are used at the moment.
     # Scaler is applied to target if 'scaler' appears in hyperparameter. Only use for regression.
     if "scaler" in hyper["training"]:
         print("Using StandardScaler.")
         scaler = StandardScaler(**hyper["training"]["scaler"]["config"])
-        y_train = scaler.fit_transform(y_train)
-        y_test = scaler.transform(y_test)
-
-        # If scaler was used we add rescaled standard metrics to compile, since otherwise the keras history will not
-        # directly log the original target values, but the scaled ones.
-        mae_metric = ScaledMeanAbsoluteError((1, 1), name="scaled_mean_absolute_error")
-        rms_metric = ScaledRootMeanSquaredError((1, 1), name="scaled_root_mean_squared_error")
-        if scaler.scale_ is not None:
-            mae_metric.set_scale(np.expand_dims(scaler.scale_, axis=0))
-            rms_metric.set_scale(np.expand_dims(scaler.scale_, axis=0))
-        metrics = [mae_metric, rms_metric]
+        # Fit on training labels only, but scale all labels, which are then drawn by index like the graphs.
+        y_data = scaler.fit(labels[train_index]).transform(labels)
+        # Metrics are reused for all splits. Keras does not reset them before the first epoch after a new compile.
+        # The scale is assigned to the existing scale variable of the metrics, which does not require retracing.
+        scale = np.expand_dims(scaler.scale_, axis=0) if scaler.scale_ is not None else None
+        for metric in metrics:
+            metric.reset_state()
+            if scale is not None:
+                metric.set_scale(scale)
     else:
         print("Not using StandardScaler.")
-        metrics = None
-    # Compile model with optimizer and loss
-    model.compile(**hyper.compile(loss="mean_absolute_error", metrics=metrics))
-    print(model.summary())
+        y_data = labels
+    # Compile model with optimizer and loss. Compiling for each split gives a new optimizer without previous state.
+    with strategy.scope():
+        model.compile(**hyper.compile(loss="mean_absolute_error",
+                                      metrics=None if metrics is None else list(metrics)))
 
     # Start and time training
     start = time.process_time()
-    hist = model.fit(x_train, y_train,
-                     validation_data=(x_test, y_test),
-                     **hyper.fit())
+    hyper_fit = hyper.fit()
+    batch_size = hyper_fit.pop("batch_size")
+    if batch_size is not None:
+        # Batch size of hyperparameter is kept per replica, the batches of the dataset are split among replicas.
+        batch_size = batch_size * strategy.num_replicas_in_sync
+    # Training and test graphs are drawn by their indices from the tensors of the full dataset.
+    dataset_test = tf_dataset_from_tensors(x_data, y_data, batch_size=batch_size, indices=test_index)
+    hist = model.fit(tf_dataset_from_tensors(x_data, y_data, batch_size=batch_size, shuffle=True, indices=train_index),
+                     validation_data=dataset_test,
+                     **hyper_fit)
     stop = time.process_time()
     print("Print Time for training: ", str(timedelta(seconds=stop - start)))
 
     # Get loss from history
     history_list.append(hist)
-    test_indices_list.append([train_index, test_index])
     splits_done = splits_done + 1
 
-# Make output directory
-filepath = hyper.results_file_path()
-postfix_file = hyper["info"]["postfix_file"]
+    # Save original data indices of the split.
+    np.savez_compressed(
+        os.path.join(filepath, model_name + "_kfold_splits" + postfix_file + "_%s.npz" % splits_done),
+        train=train_index, test=test_index)
 
 # Plot training- and test-loss vs epochs for all splits.
 data_unit = hyper["data"]["data_unit"]
@@ -150,12 +205,11 @@ plot_train_test_loss(history_list, loss_name=None, val_loss_name=None,
                      filepath=filepath, file_name="loss" + postfix_file + ".png")
 
 # Plot prediction
-predicted_y = model.predict(x_test)
-true_y = y_test
+predicted_y = model.predict(dataset_test)
+true_y = labels[test_index]  # Labels are not scaled, only the predictions must be transformed back.
 
 if scaler:
-    predicted_y = scaler.inverse_transform(predicted_y, atoms_test)
-    true_y = scaler.inverse_transform(true_y, atoms_test)
+    predicted_y = scaler.inverse_transform(predicted_y, copy=False)
 
 plot_predict_true(predicted_y, true_y,
                   filepath=filepath, data_unit=label_units,
@@ -165,8 +219,5 @@ plot_predict_true(predicted_y, true_y,
 # Save keras-model to output-folder.
 model.save(os.path.join(filepath, "model" + postfix_file))
 
-# Save original data indices of the splits.
-np.savez(os.path.join(filepath, model_name + "_kfold_splits" + postfix_file + ".npz"), test_indices_list)
-
 # Save hyperparameter again, which were used for this fit.
 hyper.save(os.path.join(filepath, model_name + "_hyper" + postfix_file + ".json"))
@@ -5,7 +5,6 @@ import time
 import os
 import argparse
 from datetime import timedelta
-from tensorflow_addons import optimizers
 from kgcnn.data.qm import QMGraphLabelScaler
 import kgcnn.training.schedule
 import kgcnn.training.scheduler
@@ -15,6 +14,7 @@ from kgcnn.utils.plots import plot_train_test_loss, plot_predict_true
 from kgcnn.utils.models import get_model_class
 from kgcnn.data.serial import deserialize as deserialize_dataset
 from kgcnn.hyper.hyper import HyperParameter
+from kgcnn.io.loader import tf_dataset_from_tensors
 
 # Input arguments from command line.
 parser = argparse.ArgumentParser(description='Train a GNN on a QMDataset.')
@@ -79,9 +79,6 @@ if multi_target_indices is not None:
         label_units = [label_units[i] for i in multi_target_indices]
 print("Labels %s in %s have shape %s" % (label_names, label_units, labels.shape))
 
-# For QMDataset, also the atomic number is required to properly pre-scale extensive quantities like total energy.
-atoms = dataset.obtain_property("node_number")
-
 # Cross-validation via random KFold split form `sklearn.model_selection`.
 kf = KFold(**hyper["training"]["cross_validation"]["config"])
 
@@ -89,8 +86,13 @@ kf = KFold(**hyper["training"]["cross_validation"]["config"])
 # train on all splits for testing.
 execute_splits = hyper["training"]["execute_folds"]
 splits_done = 0
-history_list, test_indices_list = [], []
+history_list = []
 model, hist, x_test, y_test, scaler, atoms_test = None, None, None, None, None, None
+
+# Make output directory. Indices of each split are written there as soon as the split is done.
+filepath = hyper.results_file_path()
+postfix_file = hyper["info"]["postfix_file"]
+
 for train_index, test_index in kf.split(X=np.arange(data_length)[:, None]):
 
     # Only do execute_splits out of the k-folds of cross-validation.
@@ -104,11 +106,13 @@ for train_index, test_index in kf.split(X=np.arange(data_length)[:, None]):
     # First select training and test graphs from indices, then convert them into tensorflow tensor
     # representation. Which property of the dataset and whether the tensor will be ragged is retrieved from the
     # kwargs of the keras `Input` layers ('name' and 'ragged').
-    x_train, y_train = dataset[train_index].tensor(hyper["model"]["config"]["inputs"]), labels[train_index]
-    x_test, y_test = dataset[test_index].tensor(hyper["model"]["config"]["inputs"]), labels[test_index]
-    # Also keep the same information for atomic numbers of the molecules.
-    atoms_test = [atoms[i] for i in test_index]
-    atoms_train = [atoms[i] for i in train_index]
+    dataset_train, dataset_test = dataset[train_index], dataset[test_index]
+    x_train, y_train = dataset_train.tensor(hyper["model"]["config"]["inputs"]), labels[train_index]
+    x_test, y_test = dataset_test.tensor(hyper["model"]["config"]["inputs"]), labels[test_index]
+    # Also keep the same information for atomic numbers of the molecules. For QMDataset, the atomic number is
+    # required to properly pre-scale extensive quantities like total energy.
+    atoms_test = dataset_test.obtain_property("node_number")
+    atoms_train = dataset_train.obtain_property("node_number")
 
     # Normalize training and test targets. For QM datasets this training script uses the `QMGraphLabelScaler` class.
     # Note that the QMGraphLabelScaler must receive a (serialized) list of individual scalers, one per each target.
@@ -134,24 +138,29 @@ for train_index, test_index in kf.split(X=np.arange(data_length)[:, None]):
 
     # Compile model with optimizer and loss
     model.compile(**hyper.compile(loss="mean_absolute_error", metrics=metrics))
-    print(model.summary())
+    # The model is identical for each split, so the summary is only printed for the first split.
+    if hyper["training"]["fit"].get("verbose", 1) and len(history_list) == 0:
+        model.summary()
 
     # Start and time training
     start = time.process_time()
-    hist = model.fit(x_train, y_train,
-                     validation_data=(x_test, y_test),
-                     **hyper.fit())
+    hyper_fit = hyper.fit()
+    batch_size = hyper_fit.pop("batch_size")
+    dataset_test = tf_dataset_from_tensors(x_test, y_test, batch_size=batch_size)
+    hist = model.fit(tf_dataset_from_tensors(x_train, y_train, batch_size=batch_size, shuffle=True),
+                     validation_data=dataset_test,
+                     **hyper_fit)
     stop = time.process_time()
     print("Print Time for training: ", str(timedelta(seconds=stop - start)))
 
     # Get loss from history
     history_list.append(hist)
-    test_indices_list.append([train_index, test_index])
     splits_done = splits_done + 1
 
-# Make output directory
-filepath = hyper.results_file_path()
-postfix_file = hyper["info"]["postfix_file"]
+    # Save original data indices of the split.
+    np.savez_compressed(
+        os.path.join(filepath, model_name + "_kfold_splits" + postfix_file + "_%s.npz" % splits_done),
+        train=train_index, test=test_index)
 
 # Plot training- and test-loss vs epochs for all splits.
 data_unit = hyper["data"]["data_unit"]
@@ -160,7 +169,7 @@ plot_train_test_loss(history_list, loss_name=None, val_loss_name=None,
                      filepath=filepath, file_name="loss" + postfix_file + ".png")
 
 # Plot prediction
-predicted_y = model.predict(x_test)
+predicted_y = model.predict(dataset_test)
 true_y = y_test
 
 if scaler:
@@ -175,8 +184,5 @@ plot_predict_true(predicted_y, true_y,
 # Save keras-model to output-folder.
 model.save(os.path.join(filepath, "model" + postfix_file))
 
-# Save original data indices of the splits.
-np.savez(os.path.join(filepath, model_name + "_kfold_splits" + postfix_file + ".npz"), test_indices_list)
-
 # Save hyperparameter again, which were used for this fit.
 hyper.save(os.path.join(filepath, model_name + "_hyper" + postfix_file + ".json"))
@@ -7,13 +7,13 @@ from kgcnn.data.tudataset import GraphTUDataset
 import kgcnn.training.schedule
 import kgcnn.training.scheduler
 from kgcnn.metrics.metrics import ScaledMeanAbsoluteError, ScaledRootMeanSquaredError
-from tensorflow_addons import optimizers
 from sklearn.model_selection import KFold
 from sklearn.preprocessing import StandardScaler
 from kgcnn.utils.plots import plot_train_test_loss, plot_predict_true
 from kgcnn.utils.models import get_model_class
 from kgcnn.data.serial import deserialize as deserialize_dataset
 from kgcnn.hyper.hyper import HyperParameter
+from kgcnn.io.loader import tf_dataset_from_tensors
 
 
 # Input arguments from command line with default values from example.
@@ -68,9 +68,12 @@ if len(labels.shape) <= 1:
 # Cross-validation via random KFold split form `sklearn.model_selection`.
 kf = KFold(**hyper["training"]["cross_validation"]["config"])
 
+# Make output directory. Indices of each split are written there as soon as the split is done.
+filepath = hyper.results_file_path()
+postfix_file = hyper["info"]["postfix_file"]
+
 # Iterate over the cross-validation splits.
-# Indices for train-test splits are stored in 'test_indices_list'.
-history_list, test_indices_list, model, hist, x_test, y_test, scaler = [], [], None, None, None, None, None
+history_list, model, hist, x_test, y_test, scaler = [], None, None, None, None, None
 for train_index, test_index in kf.split(X=np.arange(data_length)[:, None]):
 
     # First select training and test graphs from indices, then convert them into tensorflow tensor
@@ -106,23 +109,28 @@ for train_index, test_index in kf.split(X=np.arange(data_length)[:, None]):
     # Compile model with optimizer and loss from hyperparameter. The metrics from this script is added to the
     # hyperparameter entry for metrics.
     model.compile(**hyper.compile(metrics=metrics))
-    print(model.summary())
+    # The model is identical for each split, so the summary is only printed for the first split.
+    if hyper["training"]["fit"].get("verbose", 1) and len(history_list) == 0:
+        model.summary()
 
     # Run keras model-fit and take time for training.
     start = time.process_time()
-    hist = model.fit(x_train, y_train,
-                     validation_data=(x_test, y_test),
-                     **hyper.fit())
+    hyper_fit = hyper.fit()
+    batch_size = hyper_fit.pop("batch_size")
+    dataset_test = tf_dataset_from_tensors(x_test, y_test, batch_size=batch_size)
+    hist = model.fit(tf_dataset_from_tensors(x_train, y_train, batch_size=batch_size, shuffle=True),
+                     validation_data=dataset_test,
+                     **hyper_fit)
     stop = time.process_time()
     print("Print Time for training: ", str(timedelta(seconds=stop - start)))
 
     # Get loss from history
     history_list.append(hist)
-    test_indices_list.append([train_index, test_index])
 
-# Make output directory. This can further be modified in hyperparameter.
-filepath = hyper.results_file_path()
-postfix_file = hyper["info"]["postfix_file"]
+    # Save original data indices of the split.
+    np.savez_compressed(
+        os.path.join(filepath, model_name + "_kfold_splits" + postfix_file + "_%s.npz" % len(history_list)),
+        train=train_index, test=test_index)
 
 # Plot training- and test-loss vs epochs for all splits.
 data_unit = hyper["data"]["data_unit"]
@@ -131,7 +139,7 @@ plot_train_test_loss(history_list, loss_name=None, val_loss_name=None,
                      filepath=filepath, file_name="loss" + postfix_file + ".png")
 
 # Plot prediction for the last split.
-predicted_y = model.predict(x_test)
+predicted_y = model.predict(dataset_test)
 true_y = y_test
 
 # Predictions must be rescaled to original values.
@@ -149,9 +157,6 @@ plot_predict_true(predicted_y, true_y,
 # Save keras-model to output-folder.
 model.save(os.path.join(filepath, "model"))
 
-# Save original data indices of the splits.
-np.savez(os.path.join(filepath, model_name + "_kfold_splits" + postfix_file + ".npz"), test_indices_list)
-
 # Save hyperparameter again, which were used for this fit. Format is '.json'
 # If non-serialized parameters were in the hyperparameter config file, this operation may fail.
 hyper.save(os.path.join(filepath, model_name + "_hyper" + postfix_file + ".json"))